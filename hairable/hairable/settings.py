@@ -120,6 +120,18 @@ DATABASES = {
     }
 }
 
+# Cache
+# 매장 분석 결과(히트맵, 수요 예측)와 무효화 버전 키를 모든 워커 프로세스가 함께 보도록 DB 캐시를 씁니다.
+# (프로세스별 LocMemCache이면 한 워커에서 올린 버전이 다른 워커에 전달되지 않습니다.)
+# 처음 배포할 때 python manage.py createcachetable 로 캐시 테이블을 만들어야 합니다.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'hairable_cache',
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
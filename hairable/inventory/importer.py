@@ -0,0 +1,157 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from rest_framework import serializers
+from .models import Category, InventoryItem, StockMovement
+
+IMPORT_BATCH_SIZE = 500
+# 가져오기/내보내기 파일의 열 (category는 카테고리 이름, usage는 코드 또는 한글 이름)
+ITEM_COLUMNS = (
+    'name', 'category', 'purchase_price', 'selling_price', 'usage', 'stock', 'safety_stock',
+    'storage_location', 'usage_instructions', 'precautions',
+)
+USAGE_CODES = {label: code for code, label in InventoryItem.USAGE_CHOICES}
+# 새 아이템 행에 꼭 있어야 하는 열 (기존 아이템 행은 파일에 있는 열만 수정합니다.)
+REQUIRED_COLUMNS = ('name', 'category', 'purchase_price', 'selling_price', 'usage', 'storage_location')
+
+
+class InventoryItemImportSerializer(serializers.Serializer):
+    # 가져오기 행 단위 검증 (DB 조회 없이 형식만 확인하고, 카테고리는 미리 읽어 둔 이름 표로 찾습니다.)
+    # partial로 검증해 파일에 없는 열은 기본값을 채우지 않고, 새 아이템 행의 필수 열은 InventoryImport에서 확인합니다.
+    id = serializers.IntegerField(required=False, allow_null=True)
+    name = serializers.CharField(max_length=200)
+    category = serializers.CharField(max_length=100)
+    purchase_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'))
+    selling_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0'))
+    usage = serializers.CharField()
+    stock = serializers.IntegerField(required=False, allow_null=True)
+    safety_stock = serializers.IntegerField(required=False)
+    storage_location = serializers.CharField(max_length=100)
+    usage_instructions = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    precautions = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+    def validate_usage(self, value):
+        value = USAGE_CODES.get(value, value).upper()
+        if value not in dict(InventoryItem.USAGE_CHOICES):
+            raise serializers.ValidationError('Invalid usage')
+        return value
+
+
+class InventoryImport:
+    """매장 재고 아이템을 CSV/XLSX 행에서 한꺼번에 등록하거나 수정합니다.
+
+    카테고리와 매장 기존 아이템(id, 이름)은 처음에 한 번씩 읽어 두고, 행은 batch_size씩 검증한 뒤
+    새 아이템은 bulk_create, 기존 아이템은 파일에 있는 열만 bulk_update로 저장합니다. 기존 아이템은 id 열 또는 이름으로 찾으며,
+    재고 수량이 바뀐 아이템은 차이만큼 재고 조정 내역을 남깁니다.
+    전체를 하나의 트랜잭션으로 처리하고, allow_partial이 아니면 오류가 하나라도 있을 때 아무것도 저장하지 않습니다.
+    """
+
+    def __init__(self, store, user=None, batch_size=IMPORT_BATCH_SIZE):
+        self.store = store
+        self.user = user
+        self.batch_size = batch_size
+        self.created = 0
+        self.updated = 0
+        self.errors = {}
+        # 필드 복사 비용이 행마다 들지 않도록 검증용 시리얼라이저 하나를 재사용합니다.
+        self.validator = InventoryItemImportSerializer(partial=True)
+
+    def run(self, rows, allow_partial=False):
+        with transaction.atomic():
+            self.categories = {name.lower(): category_id for category_id, name in Category.objects.values_list('id', 'name')}
+            self.existing = dict(InventoryItem.objects.filter(store=self.store).values_list('name', 'id'))
+            self.existing_ids = set(self.existing.values())
+            self.seen = set()
+
+            batch = []
+            for number, row in rows:
+                batch.append((number, row))
+                if len(batch) >= self.batch_size:
+                    self._save_batch(batch)
+                    batch = []
+            if batch:
+                self._save_batch(batch)
+
+            if self.errors and not allow_partial:
+                transaction.set_rollback(True)
+                self.created = self.updated = 0
+        return self.created, self.updated, self.errors
+
+    def _validate(self, number, row):
+        try:
+            data = dict(self.validator.run_validation(row))
+        except serializers.ValidationError as e:
+            self.errors[number] = e.detail
+            return None
+        if 'category' in data:
+            category_id = self.categories.get(data.pop('category').lower())
+            if category_id is None:
+                self.errors[number] = {'category': ['Unknown category']}
+                return None
+            data['category_id'] = category_id
+        item_id = data.pop('id', None) or self.existing.get(data.get('name'))
+        if item_id is None:
+            missing = [column for column in REQUIRED_COLUMNS if column not in data and not (column == 'category' and 'category_id' in data)]
+            if missing:
+                self.errors[number] = {column: ['This field is required.'] for column in missing}
+                return None
+            data.setdefault('safety_stock', 0)
+        elif item_id not in self.existing_ids:
+            self.errors[number] = {'id': ['Item does not belong to this store']}
+            return None
+        keys = {('name', data.get('name')), ('id', item_id)} - {('name', None), ('id', None)}
+        if keys & self.seen:
+            self.errors[number] = {'name': ['Duplicate item in file']}
+            return None
+        self.seen.update(keys)
+        for column in ('usage_instructions', 'precautions'):
+            if column in data or item_id is None:
+                data[column] = data.get(column) or ''
+        return item_id, data
+
+    def _save_batch(self, batch):
+        new_items = []
+        updates = {}
+        for number, row in batch:
+            result = self._validate(number, row)
+            if result is None:
+                continue
+            item_id, data = result
+            if item_id is None:
+                stock = data.pop('stock', None) or 0
+                new_items.append(InventoryItem(store=self.store, stock=stock, is_low_stock=stock < data['safety_stock'], **data))
+            else:
+                updates[item_id] = data
+
+        if new_items:
+            InventoryItem.objects.bulk_create(new_items, batch_size=self.batch_size)
+            # MySQL은 bulk_create 후 pk를 돌려주지 않으므로 매장 안에서 유일한 이름으로 다시 찾습니다.
+            created = dict(InventoryItem.objects.filter(store=self.store, name__in=[item.name for item in new_items]).values_list('name', 'id'))
+            self.existing.update(created)
+            self.existing_ids.update(created.values())
+            # 처음 등록한 재고는 기초 재고 내역으로 남깁니다. (재고는 이미 저장되어 있으므로 내역만 기록)
+            StockMovement.objects.bulk_create(
+                [StockMovement(item_id=created[item.name], kind='ADJUSTMENT', quantity=item.stock, user=self.user, note='기초 재고') for item in new_items if item.stock],
+                batch_size=self.batch_size,
+            )
+            self.created += len(new_items)
+
+        if updates:
+            items = InventoryItem.objects.select_for_update().filter(id__in=updates.keys()).order_by('id')
+            movements = []
+            groups = defaultdict(list)
+            for item in items:
+                data = updates[item.id]
+                stock = data.pop('stock', None)
+                if stock is not None and stock != item.stock:
+                    movements.append(StockMovement(item_id=item.id, kind='ADJUSTMENT', quantity=stock - item.stock, user=self.user, note='가져오기 재고 조정'))
+                for field, value in data.items():
+                    setattr(item, field, value)
+                # 파일에 있던 열만 저장하도록 수정하는 열 조합이 같은 아이템끼리 묶습니다. (재고만 있는 행은 내역으로만 반영)
+                groups[frozenset('category' if field == 'category_id' else field for field in data)].append(item)
+            for fields, group in groups.items():
+                if fields:
+                    InventoryItem.objects.bulk_update(group, sorted(fields), batch_size=self.batch_size)
+            StockMovement.apply(movements)
+            InventoryItem.objects.filter(id__in=updates.keys()).refresh_low_stock()
+            self.updated += sum(len(group) for group in groups.values())
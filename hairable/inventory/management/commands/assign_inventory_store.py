@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+from inventory.models import InventoryItem
+from service.models import ServiceInventory
+from stores.models import Store
+
+
+class Command(BaseCommand):
+    help = '매장이 정해지지 않은 재고 아이템(어떤 사용자에게도 보이지 않음)을 확인하고 매장을 지정합니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', type=int, help='지정할 매장 ID (없으면 목록만 출력)')
+        parser.add_argument('--items', type=int, nargs='+', help='지정할 아이템 ID (없으면 매장이 없는 아이템 전체)')
+        parser.add_argument('--shared', action='store_true', help='다른 매장 서비스에도 쓰이는 아이템 목록을 출력')
+
+    def handle(self, *args, **options):
+        if options['shared']:
+            rows = (
+                ServiceInventory.objects.exclude(service__store_id=F('inventory_item__store_id'))
+                .filter(service__store__isnull=False)
+                .values_list('inventory_item_id', 'inventory_item__name', 'inventory_item__store_id', 'service__store_id')
+                .order_by('inventory_item_id', 'service__store_id')
+                .distinct()
+            )
+            for item_id, name, store_id, other_store_id in rows:
+                self.stdout.write(f'{item_id}\t{name}\t매장 {store_id}\t다른 매장 {other_store_id} 서비스에서 사용')
+            return
+
+        items = InventoryItem.objects.filter(id__in=options['items']) if options['items'] else InventoryItem.objects.filter(store__isnull=True)
+        if options['store'] is None:
+            count = 0
+            for item_id, name, category in items.order_by('id').values_list('id', 'name', 'category__name').iterator():
+                self.stdout.write(f'{item_id}\t{name}\t{category}')
+                count += 1
+            self.stdout.write(self.style.SUCCESS(f'매장이 없는 아이템 {count}개' if not options['items'] else f'아이템 {count}개'))
+            return
+
+        if not Store.objects.filter(id=options['store']).exists():
+            raise CommandError(f'매장 {options["store"]}이(가) 없습니다.')
+        updated = items.update(store_id=options['store'])
+        self.stdout.write(self.style.SUCCESS(f'완료: 아이템 {updated}개를 매장 {options["store"]}에 지정'))
@@ -0,0 +1,85 @@
+import datetime
+import random
+import time
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from inventory.batch import BATCH_UPDATE_SIZE, bulk_update_items, patch_items
+from inventory.models import Category, InventoryItem
+from stores.models import Store
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = '재고 일괄 수정(patch_items) 처리량 벤치마크 (임시 아이템을 만들어 측정한 뒤 롤백합니다)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        ceo = User.objects.create(username='bench_ceo', email='bench_ceo@example.com', phone='010-0000-0000', birthday=datetime.date(1990, 1, 1), role='CEO')
+        store = Store.objects.create(name='bench_store', ceo=ceo)
+        category = Category.objects.create(name='bench')
+        InventoryItem.objects.bulk_create([
+            InventoryItem(
+                store=store, category=category, name=f'bench_item_{i}', purchase_price=Decimal('5000'), selling_price=Decimal('9000'),
+                usage='SALE', stock=10, safety_stock=5, storage_location='bench',
+            )
+            for i in range(options['items'])
+        ], batch_size=BATCH_UPDATE_SIZE)
+        queryset = InventoryItem.objects.filter(store=store)
+        ids = list(queryset.order_by('id').values_list('id', flat=True))
+
+        # 재고 실사(재고 값 종류가 적음)와 가격/안전재고까지 제각각인 수정, 두 가지 경우를 잽니다.
+        scenarios = {
+            'stock count': lambda: [{'id': item_id, 'stock': rng.choice([0, 5, 10, 20])} for item_id in ids],
+            'distinct values': lambda: [
+                {'id': item_id, 'stock': rng.randrange(1000), 'safety_stock': rng.randrange(50), 'selling_price': f'{rng.randrange(5000, 20000)}.00'}
+                for item_id in ids
+            ],
+        }
+        for name, make_changes in scenarios.items():
+            patch_timings = []
+            for _ in range(options['repeat']):
+                changes = make_changes()
+                started = time.perf_counter()
+                patch_items(queryset, changes, user=ceo)
+                patch_timings.append(time.perf_counter() - started)
+
+            # 같은 아이템/필드로 값별 묶음 UPDATE와 Django bulk_update를 비교합니다.
+            items = list(queryset.order_by('id'))
+            fields = sorted({field for change in changes for field in change} - {'id'} | {'is_low_stock'})
+            compare = {}
+            for label, update in [
+                ('grouped', lambda: bulk_update_items(items, fields)),
+                ('django bulk_update', lambda: InventoryItem.objects.bulk_update(items, fields, batch_size=BATCH_UPDATE_SIZE)),
+            ]:
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    update()
+                    timings.append(time.perf_counter() - started)
+                compare[label] = min(timings)
+
+            best = min(patch_timings)
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: items={len(ids)} patch_items best={best * 1000:.0f}ms ({len(ids) / best:.0f} items/s) '
+                + ' '.join(f'{label}={timing * 1000:.0f}ms' for label, timing in compare.items())
+            ))
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.core.management.base import BaseCommand
+from inventory.stock import low_stock_by_store
+from stores.models import Store
+
+
+class Command(BaseCommand):
+    help = '매장 대표에게 안전재고 미달 아이템 요약 메일을 보냅니다 (매일 아침 실행 권장)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='한 번에 조회하고 발송할 매장 수')
+        parser.add_argument('--dry-run', action='store_true', help='메일을 보내지 않고 요약만 출력')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        sent = 0
+        last_id = 0
+        while True:
+            stores = list(
+                Store.objects.filter(id__gt=last_id).order_by('id')
+                .values_list('id', 'name', 'ceo__email')[:batch_size]
+            )
+            if not stores:
+                break
+            last_id = stores[-1][0]
+            digest = low_stock_by_store([store_id for store_id, _, _ in stores])
+
+            messages = []
+            for store_id, name, email in stores:
+                items = digest.get(store_id)
+                if not items or not email:
+                    continue
+                lines = [f'- {item["name"]}: 재고 {item["stock"]} / 안전재고 {item["safety_stock"]} ({item["shortage"]}개 부족)' for item in items]
+                body = f'{name} 매장의 안전재고 미달 아이템 {len(items)}개입니다.\n\n' + '\n'.join(lines)
+                messages.append((f'[Hairable] {name} 안전재고 미달 알림', body, settings.DEFAULT_FROM_EMAIL, [email]))
+
+            if options['dry_run']:
+                for subject, body, _, recipients in messages:
+                    self.stdout.write(f'{recipients[0]} | {subject}\n{body}\n')
+            elif messages:
+                # 배치마다 SMTP 연결 하나로 모아서 보냅니다.
+                send_mass_mail(messages, fail_silently=False)
+            sent += len(messages)
+
+        self.stdout.write(self.style.SUCCESS(f'완료: 매장 {sent}곳에 알림{" (dry-run)" if options["dry_run"] else ""}'))
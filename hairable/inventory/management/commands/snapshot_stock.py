@@ -0,0 +1,27 @@
+import datetime
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from inventory.models import InventoryItem
+from inventory.stock import take_snapshots
+
+
+class Command(BaseCommand):
+    help = '재고 아이템별 마감 재고 스냅샷을 기록합니다 (매일 새벽 전날 기준으로 실행 권장)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='기준일 YYYY-MM-DD (생략하면 어제)')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        date = parse_date(options['date']) if options['date'] else today - datetime.timedelta(days=1)
+        if date is None:
+            raise CommandError('잘못된 날짜 형식입니다.')
+        if date >= today:
+            raise CommandError('마감이 지난 날짜만 스냅샷을 기록할 수 있습니다.')
+
+        started = time.perf_counter()
+        taken = take_snapshots(InventoryItem.objects.all(), date, options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'완료: {date} 기준 {taken}개 아이템 ({time.perf_counter() - started:.1f}s)'))
@@ -0,0 +1,72 @@
+# Generated by Django 4.2 on 2026-10-18 14:07
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def fill_opening_stock(apps, schema_editor):
+    # 기존 재고를 기초 재고 조정 내역으로 남겨 모든 내역의 합이 현재 재고와 같도록 맞춥니다.
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    last_id = 0
+    while True:
+        rows = list(InventoryItem.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'stock')[:1000])
+        if not rows:
+            break
+        StockMovement.objects.bulk_create([
+            StockMovement(item_id=item_id, kind='ADJUSTMENT', quantity=stock, note='기초 재고')
+            for item_id, stock in rows
+            if stock
+        ])
+        last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('service', '0022_sales_rollups'),
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('RECEIPT', '입고'), ('SALE', '매장 판매'), ('SERVICE', '매장 시술'), ('STAFF', '직원'), ('ADJUSTMENT', '재고 조정')], max_length=10, verbose_name='구분')),
+                ('quantity', models.IntegerField(verbose_name='증감 수량')),
+                ('note', models.CharField(blank=True, max_length=200, verbose_name='메모')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='처리 시각')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='inventory.inventoryitem', verbose_name='재고 아이템')),
+                ('reservation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='service.reservation', verbose_name='시술 예약')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='처리자')),
+            ],
+            options={
+                'verbose_name': '재고 입출고 내역',
+                'verbose_name_plural': '재고 입출고 내역들',
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='기준일')),
+                ('stock', models.IntegerField(verbose_name='마감 재고')),
+                ('created_at', models.DateTimeField(auto_now=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.inventoryitem', verbose_name='재고 아이템')),
+            ],
+            options={
+                'verbose_name': '재고 스냅샷',
+                'verbose_name_plural': '재고 스냅샷들',
+                'unique_together': {('item', 'date')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['item', 'created_at'], name='stock_movement_item_time_idx'),
+        ),
+        migrations.RunPython(fill_opening_stock, migrations.RunPython.noop),
+    ]
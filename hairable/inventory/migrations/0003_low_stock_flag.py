@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-18 14:08
+
+from django.db import migrations, models
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
+
+
+def fill_low_stock(apps, schema_editor):
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    InventoryItem.objects.update(is_low_stock=ExpressionWrapper(Q(stock__lt=F('safety_stock')), output_field=BooleanField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_stock_movements'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='is_low_stock',
+            field=models.BooleanField(default=False, editable=False, verbose_name='안전재고 미달'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['is_low_stock'], name='inventory_low_stock_idx'),
+        ),
+        migrations.RunPython(fill_low_stock, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 4.2 on 2026-10-18 14:09
+
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+import django.db.models.deletion
+
+
+def fill_store(apps, schema_editor):
+    # 아이템을 쓰는 서비스의 매장으로 채웁니다.
+    # - 여러 매장 서비스에 쓰이는 아이템은 재고를 매장별로 나눌 근거가 없으므로 id가 가장 작은 매장으로 정합니다. (임의 선택)
+    # - 어느 서비스에도 연결되지 않은 아이템은 매장이 하나뿐이면 그 매장으로, 아니면 비워 둡니다.
+    # 매장이 비어 있는 아이템은 어떤 사용자에게도 보이지 않으므로, 남은 아이템과 여러 매장 아이템을 출력하고
+    # assign_inventory_store 명령으로 확인/지정하도록 안내합니다.
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    ServiceInventory = apps.get_model('service', 'ServiceInventory')
+    Store = apps.get_model('stores', 'Store')
+    items_by_store = defaultdict(list)
+    shared = []
+    for item_id, store_id, stores in (
+        ServiceInventory.objects.filter(service__store__isnull=False)
+        .values('inventory_item_id')
+        .annotate(store_id=Min('service__store_id'), stores=Count('service__store_id', distinct=True))
+        .values_list('inventory_item_id', 'store_id', 'stores')
+    ):
+        items_by_store[store_id].append(item_id)
+        if stores > 1:
+            shared.append(item_id)
+    for store_id, item_ids in items_by_store.items():
+        for offset in range(0, len(item_ids), 1000):
+            InventoryItem.objects.filter(id__in=item_ids[offset:offset + 1000]).update(store_id=store_id)
+
+    store_ids = list(Store.objects.values_list('id', flat=True)[:2])
+    if len(store_ids) == 1:
+        InventoryItem.objects.filter(store__isnull=True).update(store_id=store_ids[0])
+    unassigned = list(InventoryItem.objects.filter(store__isnull=True).order_by('id').values_list('id', flat=True))
+    if unassigned:
+        print(f'\n  매장을 정하지 못한 재고 아이템 {len(unassigned)}개 (id: {_id_list(unassigned)}) - assign_inventory_store 명령으로 지정하세요.')
+    if shared:
+        print(f'\n  여러 매장 서비스에 쓰여 id가 가장 작은 매장으로 정한 재고 아이템 {len(shared)}개 (id: {_id_list(sorted(shared))}) - assign_inventory_store --shared로 확인하세요.')
+
+
+def _id_list(ids, limit=20):
+    return ', '.join(map(str, ids[:limit])) + (' ...' if len(ids) > limit else '')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0004_delete_managementcalendar'),
+        ('inventory', '0003_low_stock_flag'),
+        ('service', '0022_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='inventoryitem',
+            name='inventory_low_stock_idx',
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='store',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='inventory_items', to='stores.store', verbose_name='매장'),
+        ),
+        migrations.RunPython(fill_store, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['store', 'category'], name='inventory_store_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['store', 'is_low_stock'], name='inventory_store_low_stock_idx'),
+        ),
+    ]
@@ -1,5 +1,9 @@
-from django.db import models
+from collections import defaultdict
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
 from django.core.validators import MinValueValidator  
+from django.utils import timezone
 
 # Create your models here.
 
@@ -13,6 +17,16 @@ class Category(models.Model):
         verbose_name = '카테고리'
         verbose_name_plural = '카테고리들'
 
+class InventoryItemQuerySet(models.QuerySet):
+    def low_stock(self):
+        # 안전재고 미달 아이템 (미달 플래그 인덱스로 후보를 좁힌 뒤 실제 수량으로 다시 확인합니다.)
+        return self.filter(is_low_stock=True, stock__lt=F('safety_stock'))
+
+    def refresh_low_stock(self):
+        # 안전재고 미달 플래그를 현재 재고 기준으로 UPDATE 한 번에 다시 맞춥니다.
+        return self.update(is_low_stock=ExpressionWrapper(Q(stock__lt=F('safety_stock')), output_field=BooleanField()))
+
+
 class InventoryItem(models.Model):
     USAGE_CHOICES = [
         ('SALE', '매장 판매'),
@@ -20,6 +34,7 @@ class InventoryItem(models.Model):
         ('STAFF', '직원'),
     ]
 
+    store = models.ForeignKey('stores.Store', on_delete=models.CASCADE, null=True, related_name='inventory_items', verbose_name='매장')
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='items', verbose_name='카테고리')
     name = models.CharField(max_length=200, verbose_name='제품명')
     image = models.ImageField(upload_to='inventory/', null=True, blank=True, verbose_name='제품 사진')
@@ -31,19 +46,106 @@ class InventoryItem(models.Model):
     storage_location = models.CharField(max_length=100, verbose_name='보관 장소')
     usage_instructions = models.TextField(blank=True, verbose_name='사용 방법')
     precautions = models.TextField(blank=True, verbose_name='사용 주의사항')
+    is_low_stock = models.BooleanField(default=False, editable=False, verbose_name='안전재고 미달')
+
+    objects = InventoryItemQuerySet.as_manager()
 
     @property
     def stock_value(self):
         # 재고 금액을 계산하여 반환
         return self.purchase_price * self.stock
 
+    def is_in_stock(self, quantity=1):
+        return self.stock >= quantity
+
     def __str__(self):
         return self.name
 
     def save(self, *args, **kwargs):
         # stock_value를 설정하지 않습니다.
+        # 재고 수량은 입출고 내역(StockMovement)으로만 바꾸므로, 수정 저장 시에는 stock을 빼고 저장해
+        # 그 사이 반영된 입출고를 덮어쓰지 않습니다.
+        adding = self._state.adding
+        if adding:
+            self.is_low_stock = self.stock < self.safety_stock
+        elif kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields if not field.primary_key and field.name not in ('stock', 'is_low_stock')]
         super().save(*args, **kwargs)
+        if not adding:
+            # 안전재고가 바뀌었을 수 있으므로 DB의 현재 재고 기준으로 미달 플래그를 다시 맞춥니다.
+            InventoryItem.objects.filter(pk=self.pk).refresh_low_stock()
 
     class Meta:
         verbose_name = '재고 아이템'
         verbose_name_plural = '재고 아이템들'
+        indexes = [
+            # 매장별 재고 목록, 카테고리별 목록, 안전재고 미달 목록
+            models.Index(fields=['store', 'category'], name='inventory_store_category_idx'),
+            models.Index(fields=['store', 'is_low_stock'], name='inventory_store_low_stock_idx'),
+        ]
+
+
+# 재고 입출고 내역
+# quantity는 재고 증감(입고는 양수, 시술/판매/직원 사용은 음수)이며, 모든 내역의 합이 현재 재고와 같습니다.
+class StockMovement(models.Model):
+    KIND_CHOICES = [('RECEIPT', '입고')] + InventoryItem.USAGE_CHOICES + [('ADJUSTMENT', '재고 조정')]
+
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='movements', verbose_name='재고 아이템')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name='구분')
+    quantity = models.IntegerField(verbose_name='증감 수량')
+    reservation = models.ForeignKey('service.Reservation', on_delete=models.SET_NULL, null=True, blank=True, related_name='stock_movements', verbose_name='시술 예약')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='처리자')
+    note = models.CharField(max_length=200, blank=True, verbose_name='메모')
+    created_at = models.DateTimeField(default=timezone.now, verbose_name='처리 시각')
+
+    class Meta:
+        verbose_name = '재고 입출고 내역'
+        verbose_name_plural = '재고 입출고 내역들'
+        indexes = [
+            models.Index(fields=['item', 'created_at'], name='stock_movement_item_time_idx'),
+        ]
+
+    @classmethod
+    def apply(cls, movements):
+        """입출고 내역을 기록하고 현재 재고에 반영합니다. 트랜잭션 안에서 호출해야 합니다.
+
+        내역은 bulk_create 한 번으로 저장하고, 재고는 아이템마다 F('stock') + 증감 UPDATE 한 번씩
+        항상 아이템 ID 순서로 반영해 동시에 반영하는 요청끼리 교착 상태가 생기지 않도록 합니다.
+        """
+        movements = [movement for movement in movements if movement.quantity]
+        cls.objects.bulk_create(movements, batch_size=500)
+        totals = defaultdict(int)
+        for movement in movements:
+            totals[movement.item_id] += movement.quantity
+        for item_id in sorted(totals):
+            if totals[item_id]:
+                InventoryItem.objects.filter(pk=item_id).update(stock=F('stock') + totals[item_id])
+        if totals:
+            InventoryItem.objects.filter(pk__in=totals.keys()).refresh_low_stock()
+        return movements
+
+    @classmethod
+    def record(cls, item_id, kind, quantity, **fields):
+        with transaction.atomic():
+            return cls.apply([cls(item_id=item_id, kind=kind, quantity=quantity, **fields)])
+
+    @classmethod
+    def adjust_to(cls, item_id, stock, **fields):
+        # 실사 재고에 맞춰 현재 재고와의 차이만큼 재고 조정 내역을 남깁니다.
+        with transaction.atomic():
+            current = InventoryItem.objects.select_for_update().values_list('stock', flat=True).get(pk=item_id)
+            return cls.apply([cls(item_id=item_id, kind='ADJUSTMENT', quantity=stock - current, **fields)])
+
+
+# 날짜별 마감 재고 스냅샷 (그날 현지 자정까지의 입출고 합)
+# 특정 시점 재고는 그 이전 가장 최근 스냅샷 + 이후 입출고 범위 합으로 구합니다. (inventory.stock.stock_as_of)
+class StockSnapshot(models.Model):
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='snapshots', verbose_name='재고 아이템')
+    date = models.DateField(verbose_name='기준일')
+    stock = models.IntegerField(verbose_name='마감 재고')
+    created_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = '재고 스냅샷'
+        verbose_name_plural = '재고 스냅샷들'
+        unique_together = ('item', 'date')
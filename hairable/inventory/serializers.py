@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Category, InventoryItem
+from .models import Category, InventoryItem, StockMovement
 
 class InventoryItemSerializer(serializers.ModelSerializer):
     class Meta:
@@ -19,10 +19,11 @@ class InventoryItemDetailSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = InventoryItem
-        fields = ['id', 'category', 'category_name', 'name', 'image', 'purchase_price', 'selling_price', 
-                'usage', 'stock', 'safety_stock', 'stock_value', 'storage_location', 
+        fields = ['id', 'store', 'category', 'category_name', 'name', 'image', 'purchase_price', 'selling_price', 
+                'usage', 'stock', 'safety_stock', 'is_low_stock', 'stock_value', 'storage_location', 
                 'usage_instructions', 'precautions']
-        read_only_fields = ['id', 'category_name']
+        read_only_fields = ['id', 'category_name', 'is_low_stock']
+        extra_kwargs = {'store': {'required': True, 'allow_null': False}}
 
 class InventoryItemUpdateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -35,4 +36,13 @@ class InventoryItemUpdateSerializer(serializers.ModelSerializer):
         if self.instance:
             for field in self.fields:
                 if field != self.context['update_field']:
-                    self.fields[field].read_only = True
\ No newline at end of file
+                    self.fields[field].read_only = True
+
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    kind_display = serializers.CharField(source='get_kind_display', read_only=True)
+
+    class Meta:
+        model = StockMovement
+        fields = ['id', 'item', 'kind', 'kind_display', 'quantity', 'reservation', 'user', 'note', 'created_at']
+        read_only_fields = fields
@@ -0,0 +1,84 @@
+import datetime
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.utils import timezone
+from .models import InventoryItem, StockMovement, StockSnapshot
+
+
+def _day_start(date):
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time.min))
+
+
+def stock_as_of(item_ids, at):
+    """at 시각 직전의 아이템별 재고를 {아이템 ID: 재고} 로 돌려줍니다.
+
+    at 이전에 마감된 가장 최근 스냅샷에 그 다음 날 0시부터 at까지의 입출고 합을 더하므로,
+    전체 내역을 처음부터 합산하지 않고 (아이템, 처리 시각) 인덱스의 짧은 범위만 읽습니다.
+    스냅샷이 없는 아이템은 처음부터 합산합니다.
+    """
+    item_ids = list(item_ids)
+    latest = dict(
+        StockSnapshot.objects.filter(item_id__in=item_ids, date__lt=timezone.localdate(at))
+        .values('item_id')
+        .annotate(last=Max('date'))
+        .values_list('item_id', 'last')
+    )
+    balances = dict.fromkeys(item_ids, 0)
+    for item_id, date, stock in StockSnapshot.objects.filter(
+        item_id__in=latest.keys(), date__in=set(latest.values())
+    ).values_list('item_id', 'date', 'stock'):
+        if latest[item_id] == date:
+            balances[item_id] = stock
+
+    # 스냅샷 날짜가 같은 아이템끼리 묶어 범위 합산합니다. (매일 스냅샷을 찍으면 보통 한 번의 쿼리)
+    groups = defaultdict(list)
+    for item_id in item_ids:
+        groups[latest.get(item_id)].append(item_id)
+    for date, ids in groups.items():
+        movements = StockMovement.objects.filter(item_id__in=ids, created_at__lt=at)
+        if date:
+            movements = movements.filter(created_at__gte=_day_start(date + datetime.timedelta(days=1)))
+        for item_id, total in movements.values('item_id').annotate(total=Sum('quantity')).values_list('item_id', 'total'):
+            balances[item_id] += total
+    return balances
+
+
+def take_snapshots(items, date, chunk_size=2000):
+    """items의 date 마감 재고 스냅샷을 기록합니다. (이미 있으면 다시 계산해 덮어씁니다.)
+
+    date는 이미 지난 날짜여야 하며, 아이템을 id 순으로 chunk_size씩 끊어 처리합니다.
+    기록한 스냅샷 수를 반환합니다.
+    """
+    end = _day_start(date + datetime.timedelta(days=1))
+    items = items.order_by('id')
+    taken = 0
+    last_id = 0
+    while True:
+        ids = list(items.filter(id__gt=last_id).values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return taken
+        with transaction.atomic():
+            # 같은 날짜의 기존 스냅샷을 기준으로 삼지 않도록 지우고 date 이전 스냅샷부터 계산합니다.
+            StockSnapshot.objects.filter(item_id__in=ids, date=date).delete()
+            balances = stock_as_of(ids, end)
+            StockSnapshot.objects.bulk_create(
+                [StockSnapshot(item_id=item_id, date=date, stock=stock) for item_id, stock in balances.items()],
+                batch_size=500,
+            )
+        taken += len(ids)
+        last_id = ids[-1]
+
+
+def low_stock_by_store(store_ids):
+    """매장별 안전재고 미달 아이템 {매장 ID: [아이템, ...]} 을 (store, is_low_stock) 인덱스로 한 번에 읽습니다."""
+    digest = defaultdict(list)
+    rows = (
+        InventoryItem.objects.low_stock()
+        .filter(store_id__in=store_ids)
+        .values_list('store_id', 'id', 'name', 'stock', 'safety_stock')
+        .order_by('store_id', 'id')
+    )
+    for store_id, item_id, name, stock, safety_stock in rows:
+        digest[store_id].append({'id': item_id, 'name': name, 'stock': stock, 'safety_stock': safety_stock, 'shortage': safety_stock - stock})
+    return digest
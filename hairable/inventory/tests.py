@@ -0,0 +1,164 @@
+import datetime
+from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APITestCase
+from accounts.models import User
+from stores.models import Store, StoreStaff
+from utils.imports import iter_upload_rows
+from .batch import bulk_update_items, patch_items
+from .importer import InventoryImport
+from .models import Category, InventoryItem, StockMovement
+
+
+class InventoryImportTests(TestCase):
+    def setUp(self):
+        ceo = User.objects.create(username='ceo', email='ceo@example.com', phone='010-1111-1111', birthday=datetime.date(1990, 1, 1), role='CEO')
+        self.store = Store.objects.create(name='store', ceo=ceo)
+        self.category = Category.objects.create(name='샴푸')
+        self.item = InventoryItem.objects.create(
+            store=self.store, category=self.category, name='샴푸 A', purchase_price=Decimal('5000'), selling_price=Decimal('9000'),
+            usage='SALE', stock=10, safety_stock=5, storage_location='창고', usage_instructions='두피에 바릅니다.', precautions='눈에 닿지 않게',
+        )
+
+    def run_import(self, content):
+        upload = SimpleUploadedFile('items.csv', content.encode('utf-8'), content_type='text/csv')
+        return InventoryImport(self.store).run(iter_upload_rows(upload))
+
+    def test_partial_columns_update_only_given_fields(self):
+        created, updated, errors = self.run_import('name,selling_price,stock\n샴푸 A,9500,3\n')
+
+        self.assertEqual((created, updated, errors), (0, 1, {}))
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.selling_price, Decimal('9500'))
+        self.assertEqual(self.item.stock, 3)
+        # 파일에 없는 열은 그대로 남아야 합니다.
+        self.assertEqual(self.item.safety_stock, 5)
+        self.assertEqual(self.item.usage_instructions, '두피에 바릅니다.')
+        self.assertEqual(self.item.precautions, '눈에 닿지 않게')
+        self.assertEqual(self.item.purchase_price, Decimal('5000'))
+        self.assertTrue(self.item.is_low_stock)
+        self.assertEqual(list(StockMovement.objects.filter(item=self.item).values_list('quantity', flat=True)), [-7])
+
+    def test_new_item_requires_full_columns(self):
+        created, updated, errors = self.run_import('name,selling_price\n샴푸 B,9500\n')
+
+        self.assertEqual((created, updated), (0, 0))
+        self.assertEqual(set(errors[2]), {'category', 'purchase_price', 'usage', 'storage_location'})
+        self.assertFalse(InventoryItem.objects.filter(name='샴푸 B').exists())
+
+
+class InventoryItemPermissionTests(APITestCase):
+    def setUp(self):
+        ceo = User.objects.create(username='ceo', email='ceo@example.com', phone='010-1111-1111', birthday=datetime.date(1990, 1, 1), role='CEO')
+        store = Store.objects.create(name='store', ceo=ceo)
+        self.item = InventoryItem.objects.create(
+            store=store, category=Category.objects.create(name='샴푸'), name='샴푸 A', purchase_price=Decimal('5000'),
+            selling_price=Decimal('9000'), usage='SALE', stock=10, safety_stock=5, storage_location='창고',
+        )
+        self.designer = User.objects.create(username='designer', email='designer@example.com', phone='010-2222-2222', birthday=datetime.date(1990, 1, 1), role='designer')
+        self.manager = User.objects.create(username='manager', email='manager@example.com', phone='010-3333-3333', birthday=datetime.date(1990, 1, 1), role='manager')
+        StoreStaff.objects.create(store=store, user=self.designer, role='designer')
+        StoreStaff.objects.create(store=store, user=self.manager, role='manager')
+        self.movements_url = f'/api/inventory/items/{self.item.id}/movements/'
+
+    def test_designer_can_read_but_not_record_movements(self):
+        self.client.force_authenticate(self.designer)
+
+        self.assertEqual(self.client.get(self.movements_url).status_code, 200)
+        response = self.client.post(self.movements_url, {'kind': 'SALE', 'quantity': 3}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.stock, 10)
+
+    def test_designer_cannot_update_field(self):
+        self.client.force_authenticate(self.designer)
+
+        response = self.client.patch(f'/api/inventory/items/{self.item.id}/update_field/', {'field': 'stock', 'value': 0}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.stock, 10)
+
+    def test_manager_can_record_movements(self):
+        self.client.force_authenticate(self.manager)
+
+        response = self.client.post(self.movements_url, {'kind': 'SALE', 'quantity': 3}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['stock'], 7)
+
+
+class PatchItemsTests(TestCase):
+    def setUp(self):
+        ceo = User.objects.create(username='ceo', email='ceo@example.com', phone='010-1111-1111', birthday=datetime.date(1990, 1, 1), role='CEO')
+        self.store = Store.objects.create(name='store', ceo=ceo)
+        self.category = Category.objects.create(name='샴푸')
+        self.other_category = Category.objects.create(name='린스')
+        self.items = [
+            InventoryItem.objects.create(
+                store=self.store, category=self.category, name=f'샴푸 {i}', purchase_price=Decimal('5000'), selling_price=Decimal('9000'),
+                usage='SALE', stock=10, safety_stock=5, storage_location='창고',
+            )
+            for i in range(4)
+        ]
+        self.queryset = InventoryItem.objects.filter(store=self.store)
+
+    def test_mixed_field_sets_update_only_given_fields(self):
+        a, b, c, d = self.items
+        updated, errors = patch_items(self.queryset, [
+            {'id': a.id, 'selling_price': '9500'},
+            {'id': b.id, 'name': '샴푸 B', 'category': self.other_category.id},
+            {'id': c.id, 'selling_price': '9500', 'storage_location': '진열대'},
+            {'id': d.id, 'usage_instructions': '두피에 바릅니다.'},
+        ])
+
+        self.assertEqual((updated, errors), (4, {}))
+        for item in self.items:
+            item.refresh_from_db()
+        self.assertEqual((a.selling_price, a.storage_location), (Decimal('9500'), '창고'))
+        self.assertEqual((b.name, b.category_id, b.selling_price), ('샴푸 B', self.other_category.id, Decimal('9000')))
+        self.assertEqual((c.selling_price, c.storage_location), (Decimal('9500'), '진열대'))
+        self.assertEqual((d.usage_instructions, d.selling_price, d.name), ('두피에 바릅니다.', Decimal('9000'), '샴푸 3'))
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_grouped_values_across_batches(self):
+        for item, stock in zip(self.items, [3, 3, 7, 3]):
+            item.stock = stock
+        # 같은 값은 When 하나로 묶이고, 배치가 나뉘어도 아이템마다 자기 값이 들어가야 합니다.
+        with self.assertNumQueries(2):
+            bulk_update_items(self.items, ['stock'], batch_size=2)
+
+        self.assertEqual(list(self.queryset.order_by('id').values_list('stock', flat=True)), [3, 3, 7, 3])
+
+    def test_stock_changes_record_adjustments_and_low_stock_flag(self):
+        a, b, c, d = self.items
+        updated, errors = patch_items(self.queryset, [
+            {'id': a.id, 'stock': 2},
+            {'id': b.id, 'safety_stock': 20},
+            {'id': c.id, 'stock': 10, 'safety_stock': 3},
+            {'id': d.id, 'stock': 30, 'safety_stock': 40},
+        ])
+
+        self.assertEqual((updated, errors), (4, {}))
+        flags = dict(self.queryset.values_list('id', 'is_low_stock'))
+        # 재고만 바꾸든 안전재고만 바꾸든 잠근 행의 나머지 값과 비교해 플래그를 다시 맞춥니다.
+        self.assertEqual(flags, {a.id: True, b.id: True, c.id: False, d.id: True})
+        self.assertEqual(set(self.queryset.low_stock().values_list('id', flat=True)), {a.id, b.id, d.id})
+        # 재고가 실제로 바뀐 아이템만 차이만큼 재고 조정 내역이 남습니다.
+        self.assertEqual(
+            sorted(StockMovement.objects.values_list('item_id', 'kind', 'quantity')),
+            [(a.id, 'ADJUSTMENT', -8), (d.id, 'ADJUSTMENT', 20)],
+        )
+
+    def test_errors_reject_whole_batch_unless_partial(self):
+        a, b = self.items[:2]
+        changes = [{'id': a.id, 'stock': 0}, {'id': b.id, 'stock': 'many'}]
+
+        updated, errors = patch_items(self.queryset, changes)
+        self.assertEqual((updated, list(errors)), (0, [1]))
+        a.refresh_from_db()
+        self.assertEqual(a.stock, 10)
+
+        updated, errors = patch_items(self.queryset, changes, allow_partial=True)
+        self.assertEqual((updated, list(errors)), (1, [1]))
+        a.refresh_from_db()
+        self.assertEqual((a.stock, a.is_low_stock), (0, True))
@@ -1,12 +1,37 @@
+import datetime
+from django.db import transaction
+from django.db.models import F, Prefetch
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .models import Category, InventoryItem
-from .serializers import CategorySerializer, InventoryItemDetailSerializer, InventoryItemUpdateSerializer
+from .batch import patch_items
+from .forecast import depletion_forecast
+from .importer import ITEM_COLUMNS, InventoryImport
+from .models import Category, InventoryItem, StockMovement
+from .serializers import CategorySerializer, InventoryItemDetailSerializer, InventoryItemUpdateSerializer, StockMovementSerializer
+from .stock import stock_as_of
+from stores.models import Store
+from utils.exports import iter_rows, stream_csv, wants_gzip
+from utils.imports import ImportFileError, iter_upload_rows
 from utils.permissions import UserRolePermission
 
+MAX_FORECAST_DAYS = 180
+MAX_MOVEMENTS = 500
+MAX_IMPORT_BYTES = 20 * 1024 * 1024
+MAX_BATCH_ITEMS = 5000
+# 직접 등록할 수 있는 입출고 구분 (시술 사용은 방문 완료 처리에서 자동으로 기록됩니다.)
+MANUAL_MOVEMENT_KINDS = ('RECEIPT', 'SALE', 'STAFF', 'ADJUSTMENT')
+
+def user_store_ids(user):
+    # 요청자가 대표이거나 직원으로 속한 매장 ID 목록
+    return list(Store.objects.for_user(user).values_list('id', flat=True))
+
+
 class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -16,39 +41,114 @@ class CategoryViewSet(viewsets.ModelViewSet):
             return [IsAuthenticated(), UserRolePermission("CEO", "manager")]
         return [IsAuthenticated(), UserRolePermission("CEO", "manager","designer")]
 
+    def get_queryset(self):
+        # 카테고리는 매장 공용이고, 함께 내려주는 아이템은 요청자 매장의 아이템만 포함합니다.
+        items = InventoryItem.objects.filter(store_id__in=user_store_ids(self.request.user))
+        return Category.objects.prefetch_related(Prefetch('items', queryset=items))
+
 
 class InventoryItemViewSet(viewsets.ModelViewSet):
     queryset = InventoryItem.objects.all()
     serializer_class = InventoryItemDetailSerializer
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        # movements는 GET(이력 조회)만 모든 직원에게 열고, POST(입출고 기록)는 재고를 바꾸므로 대표/매니저만 허용합니다.
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'import_items', 'batch_update', 'update_field'] or (
+            self.action == 'movements' and self.request.method != 'GET'
+        ):
             return [IsAuthenticated(), UserRolePermission("CEO", "manager")]
         return [IsAuthenticated()]
 
     def get_queryset(self):
-        queryset = InventoryItem.objects.all()
+        # 요청자 매장의 아이템만 조회합니다. (store, category) 인덱스로 매장/카테고리별 목록을 바로 찾습니다.
+        queryset = InventoryItem.objects.filter(store_id__in=user_store_ids(self.request.user)).select_related('category').order_by('id')
+        store_id = self.request.query_params.get('store_id', None)
+        if store_id is not None:
+            queryset = queryset.filter(store_id=store_id)
         category_id = self.request.query_params.get('category_id', None)
         if category_id is not None:
             queryset = queryset.filter(category_id=category_id)
         return queryset
+
+    def check_store(self, store):
+        if not Store.objects.for_user(self.request.user).filter(id=store.id).exists():
+            raise PermissionDenied("You do not belong to this store")
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        category_id = request.data.get('category')
-        if not category_id:
-            return Response({"error": "Category is required"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        try:
-            category = Category.objects.get(id=category_id)
-        except Category.DoesNotExist:
-            return Response({"error": "Invalid category ID"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        serializer.save(category=category)
+        self.check_store(serializer.validated_data['store'])
+
+        # 처음 등록한 재고는 기초 재고 내역으로 남깁니다. (재고는 이미 저장되어 있으므로 내역만 기록)
+        with transaction.atomic():
+            item = serializer.save()
+            if item.stock:
+                StockMovement.objects.create(item=item, kind='ADJUSTMENT', quantity=item.stock, user=request.user, note='기초 재고')
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    def perform_update(self, serializer):
+        # 재고 수량은 덮어쓰지 않고 실사 재고와의 차이만큼 재고 조정 내역으로 반영합니다.
+        stock = serializer.validated_data.pop('stock', None)
+        if 'store' in serializer.validated_data:
+            self.check_store(serializer.validated_data['store'])
+        with transaction.atomic():
+            item = serializer.save()
+            if stock is not None:
+                StockMovement.adjust_to(item.pk, stock, user=self.request.user)
+                item.refresh_from_db(fields=['stock'])
+
+    # 재고 아이템 CSV/XLSX 일괄 가져오기 (multipart: file, store)
+    # id 열이나 이름이 같은 매장 아이템은 수정하고 나머지는 새로 등록하며, ?allow_partial=1이면 오류 행만 빼고 저장합니다.
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_items(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "File is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if upload.size > MAX_IMPORT_BYTES:
+            return Response({"error": f"File must be smaller than {MAX_IMPORT_BYTES // (1024 * 1024)}MB"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            store = Store.objects.for_user(request.user).get(id=request.data.get('store'))
+        except (Store.DoesNotExist, TypeError, ValueError):
+            return Response({"error": "Invalid store ID"}, status=status.HTTP_400_BAD_REQUEST)
+        allow_partial = str(request.query_params.get('allow_partial', '')).lower() in ('1', 'true')
+
+        try:
+            created, updated, errors = InventoryImport(store, request.user).run(iter_upload_rows(upload), allow_partial)
+        except ImportFileError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = {
+            'created': created,
+            'updated': updated,
+            'errors': [{'row': row, 'errors': errors[row]} for row in sorted(errors)],
+        }
+        return Response(response, status=status.HTTP_400_BAD_REQUEST if errors and not (created or updated) else status.HTTP_200_OK)
+
+    # 재고 아이템 CSV 내보내기 (가져오기와 같은 열, list와 같은 필터, ?gzip=1이면 압축)
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        fields = ['category__name' if column == 'category' else column for column in ITEM_COLUMNS]
+        return stream_csv('inventory.csv', ('id', *ITEM_COLUMNS), iter_rows(self.get_queryset(), fields), compress=wants_gzip(request))
+
+    # 여러 아이템 여러 필드 일괄 수정 (재고 실사 등, {"items": [{"id": 1, "stock": 10, "safety_stock": 3}, ...]})
+    # ?allow_partial=1이면 오류 항목만 빼고 저장합니다.
+    @action(detail=False, methods=['patch'], url_path='batch')
+    def batch_update(self, request):
+        changes = request.data.get('items') if isinstance(request.data, dict) else request.data
+        if not isinstance(changes, list) or not changes:
+            return Response({"error": "A list of items is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(changes) > MAX_BATCH_ITEMS:
+            return Response({"error": f"At most {MAX_BATCH_ITEMS} items can be updated at once"}, status=status.HTTP_400_BAD_REQUEST)
+        allow_partial = str(request.query_params.get('allow_partial', '')).lower() in ('1', 'true')
+
+        updated, errors = patch_items(self.get_queryset(), changes, request.user, allow_partial)
+        response = {
+            'updated': updated,
+            'errors': [{'index': index, 'id': changes[index].get('id') if isinstance(changes[index], dict) else None, 'errors': errors[index]} for index in sorted(errors)],
+        }
+        return Response(response, status=status.HTTP_200_OK if updated or not errors else status.HTTP_400_BAD_REQUEST)
+
     @action(detail=True, methods=['patch'])
     def update_field(self, request, pk=None):
         item = self.get_object()
@@ -60,6 +160,102 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
 
         serializer = InventoryItemUpdateSerializer(item, data={field: value}, partial=True, context={'update_field': field})
         if serializer.is_valid():
-            serializer.save()
+            self.perform_update(serializer)
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    # 매장 재고의 앞으로 days일(기본 30일) 예상 재고, 소진일, 안전재고 미달일 (?store_id=&days=)
+    @action(detail=False, methods=['get'])
+    def forecast(self, request):
+        store_id = request.query_params.get('store_id')
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            return Response({"error": "Invalid days"}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= days <= MAX_FORECAST_DAYS:
+            return Response({"error": f"days must be between 1 and {MAX_FORECAST_DAYS}"}, status=status.HTTP_400_BAD_REQUEST)
+        if not store_id or not Store.objects.for_user(request.user).filter(id=store_id).exists():
+            return Response({"error": "Invalid store ID"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(depletion_forecast(InventoryItem.objects.filter(store_id=store_id), days))
+
+    # 안전재고 미달 아이템 (부족 수량이 큰 순서, ?category_id=&store_id=)
+    @action(detail=False, methods=['get'])
+    def low_stock(self, request):
+        items = (
+            self.get_queryset().low_stock()
+            .annotate(shortage=F('safety_stock') - F('stock'))
+            .order_by('-shortage', 'id')
+            .values('id', 'store_id', 'category_id', 'name', 'stock', 'safety_stock', 'shortage', 'storage_location')
+        )
+        return Response(list(items))
+
+    # 아이템 입출고 내역 조회(최근 순, ?from=&to=&limit=) 및 입고/판매/직원 사용/재고 조정 등록
+    # 등록 시 quantity는 입고/판매/직원 사용이면 양수 수량, 재고 조정이면 증감 수량이고, 재고 조정은 quantity 대신 실사 재고(stock)를 줄 수 있습니다.
+    @action(detail=True, methods=['get', 'post'])
+    def movements(self, request, pk=None):
+        item = self.get_object()
+        if request.method == 'GET':
+            movements = item.movements.order_by('-created_at', '-id')
+            try:
+                start = self._parse_moment(request.query_params.get('from'))
+                end = self._parse_moment(request.query_params.get('to'), end=True)
+                limit = min(int(request.query_params.get('limit', 100)), MAX_MOVEMENTS)
+            except ValueError:
+                return Response({"error": "Invalid query parameter"}, status=status.HTTP_400_BAD_REQUEST)
+            if start:
+                movements = movements.filter(created_at__gte=start)
+            if end:
+                movements = movements.filter(created_at__lt=end)
+            return Response(StockMovementSerializer(movements[:limit], many=True).data)
+
+        kind = request.data.get('kind')
+        note = request.data.get('note') or ''
+        if kind not in MANUAL_MOVEMENT_KINDS:
+            return Response({"error": "Invalid movement kind"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            if kind == 'ADJUSTMENT' and request.data.get('stock') is not None:
+                movements = StockMovement.adjust_to(item.pk, int(request.data['stock']), user=request.user, note=note)
+            else:
+                quantity = int(request.data.get('quantity'))
+                if kind != 'ADJUSTMENT' and quantity <= 0:
+                    return Response({"error": "Quantity must be positive"}, status=status.HTTP_400_BAD_REQUEST)
+                if kind in ('SALE', 'STAFF'):
+                    quantity = -quantity
+                movements = StockMovement.record(item.pk, kind, quantity, user=request.user, note=note)
+        except (TypeError, ValueError):
+            return Response({"error": "Invalid quantity"}, status=status.HTTP_400_BAD_REQUEST)
+        item.refresh_from_db(fields=['stock'])
+        return Response({
+            'stock': item.stock,
+            'movements': StockMovementSerializer(movements, many=True).data,
+        }, status=status.HTTP_201_CREATED if movements else status.HTTP_200_OK)
+
+    # 특정 시점 재고 (?at=YYYY-MM-DD이면 그날 마감 기준, ISO 일시이면 그 시각 기준, category_id 필터 가능)
+    @action(detail=False, methods=['get'])
+    def stock_as_of(self, request):
+        try:
+            at = self._parse_moment(request.query_params.get('at'), end=True)
+        except ValueError:
+            at = None
+        if at is None:
+            return Response({"error": "Invalid at"}, status=status.HTTP_400_BAD_REQUEST)
+        items = list(self.get_queryset().order_by('id').values('id', 'name'))
+        balances = stock_as_of([item['id'] for item in items], at)
+        return Response({
+            'at': at,
+            'items': [{'id': item['id'], 'name': item['name'], 'stock': balances[item['id']]} for item in items],
+        })
+
+    @staticmethod
+    def _parse_moment(value, end=False):
+        # YYYY-MM-DD 또는 ISO 일시를 시각으로 변환합니다. 날짜만 주어진 종료 경계는 그날 하루를 포함합니다.
+        if not value:
+            return None
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(value)
+            moment = datetime.datetime.combine(day + datetime.timedelta(days=1) if end else day, datetime.time.min)
+        return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
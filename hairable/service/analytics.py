@@ -0,0 +1,241 @@
+import datetime
+from itertools import chain
+import numpy as np
+from scipy.ndimage import gaussian_filter1d
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import Count, F
+from django.utils import timezone
+from stores.models import WorkCalendar
+from .models import Reservation, analytics_version_key
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+# 1970-01-01(유닉스 기준일)은 목요일이므로, 월요일 0시 기준 주 안의 분으로 바꾸려면 3일을 더합니다.
+EPOCH_WEEK_OFFSET = 3 * MINUTES_PER_DAY
+HEATMAP_RESOLUTIONS = (15, 30, 60)
+HEATMAP_CACHE_SECONDS = 24 * 60 * 60
+
+
+def _local_minutes(starts):
+    """UTC 기준 유닉스 초 배열을 현지 시각 기준 분 배열로 바꿉니다.
+
+    서머타임이 있는 시간대도 맞도록 날짜별 UTC 오프셋을 구하되, 같은 날짜는 한 번만 계산합니다.
+    """
+    days, inverse = np.unique(starts // 86400, return_inverse=True)
+    zone = timezone.get_current_timezone()
+    offsets = np.array([
+        datetime.datetime.fromtimestamp(int(day) * 86400 + 43200, tz=zone).utcoffset().total_seconds()
+        for day in days
+    ], dtype=np.int64)
+    return (starts + offsets[inverse]) // 60
+
+
+def occupancy_matrix(starts, durations, resolution=60, counts=None):
+    """예약 시작 시각(UTC 유닉스 초)과 길이(분) 배열을 요일 x 시간대 점유 분 행렬로 묶습니다.
+
+    주 안의 분 단위로 시작 +1, 종료 -1을 bincount로 쌓은 뒤 누적합으로 분마다 동시 예약 수를 구하고,
+    resolution 분씩 더해 (7, 1440 / resolution) 행렬을 만듭니다. 일요일 밤에서 월요일로 넘어가는 예약은
+    주 끝과 주 처음으로 나눠 더합니다. counts가 있으면 각 구간을 그 수만큼 겹친 것으로 셉니다.
+    """
+    slots = MINUTES_PER_DAY // resolution
+    if len(starts) == 0:
+        return np.zeros((7, slots), dtype=np.int64)
+
+    week_start = (_local_minutes(starts) + EPOCH_WEEK_OFFSET) % MINUTES_PER_WEEK
+    week_end = week_start + durations
+    wrapped = week_end > MINUTES_PER_WEEK
+
+    begin = np.concatenate([week_start, np.zeros(np.count_nonzero(wrapped), dtype=np.int64)])
+    end = np.concatenate([np.minimum(week_end, MINUTES_PER_WEEK), week_end[wrapped] - MINUTES_PER_WEEK])
+    weights = None if counts is None else np.concatenate([counts, counts[wrapped]])
+    delta = np.bincount(begin, weights, minlength=MINUTES_PER_WEEK + 1) - np.bincount(end, weights, minlength=MINUTES_PER_WEEK + 1)
+    coverage = np.cumsum(delta[:MINUTES_PER_WEEK]).astype(np.int64)
+    return coverage.reshape(7, slots, resolution).sum(axis=2)
+
+
+def _epoch_seconds_sql(connection, column):
+    # 일시 열을 UTC 기준 유닉스 초(정수)로 바꾸는 DB별 SQL.
+    # MySQL은 UTC로 저장된 값을 세션 시간대와 무관하게 빼기만 하도록 UNIX_TIMESTAMP 대신 TIMESTAMPDIFF를 씁니다.
+    if connection.vendor == 'postgresql':
+        return f'EXTRACT(EPOCH FROM {column})::bigint'
+    if connection.vendor == 'sqlite':
+        # sqlite 백엔드가 %%를 %로 바꾸므로 strftime 형식 문자는 이스케이프합니다.
+        return f"CAST(strftime('%%s', {column}) AS INTEGER)"
+    return f"TIMESTAMPDIFF(SECOND, '1970-01-01 00:00:00', {column})"
+
+
+def reservation_arrays(queryset):
+    """(시작 UTC 유닉스 초, 길이 분, 예약 수) 배열을 돌려줍니다.
+
+    시작과 종료가 같은 예약은 DB에서 GROUP BY로 묶어 한 행으로 받고, 유닉스 초 변환도 묶인 행에만 DB에서 합니다.
+    (1년치 예약 100만 건이 7만 행 정도로 줄어 행마다 datetime 객체를 만들지 않습니다.)
+    """
+    grouped = (
+        queryset.order_by()
+        .values(span_start=F('reservation_time'), span_end=F('end_time'))
+        .annotate(span_count=Count('id'))
+    )
+    try:
+        sql, params = grouped.query.sql_with_params()
+    except EmptyResultSet:
+        # none()이나 빈 id__in처럼 쿼리 없이 비는 경우
+        values = np.empty((0, 3), dtype=np.int64)
+        return values[:, 0], values[:, 1], values[:, 2]
+    connection = connections[queryset.db]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT {_epoch_seconds_sql(connection, quote("span_start"))}, {_epoch_seconds_sql(connection, quote("span_end"))}, '
+            f'{quote("span_count")} FROM ({sql}) {quote("spans")}',
+            params,
+        )
+        values = np.fromiter(chain.from_iterable(cursor.fetchall()), dtype=np.int64).reshape(-1, 3)
+    return values[:, 0], (values[:, 1] - values[:, 0]) // 60, values[:, 2]
+
+
+def store_heatmap(store_id, start_date, end_date, designer_id=None, resolution=60):
+    """매장(또는 디자이너)의 [start_date, end_date] 기간 요일 x 시간대 점유 분 행렬을 돌려줍니다.
+
+    결과는 매장 분석 버전과 함께 캐시되며, 매장 예약이 바뀌면 버전이 올라가 다시 계산됩니다.
+    """
+    version = cache.get(analytics_version_key(store_id), 0)
+    cache_key = f'analytics:heatmap:{store_id}:{version}:{designer_id or "all"}:{resolution}:{start_date}:{end_date}'
+    result = cache.get(cache_key)
+    if result is not None:
+        return result
+
+    queryset = Reservation.objects.active().filter(
+        store_id=store_id,
+        reservation_time__gte=timezone.make_aware(datetime.datetime.combine(start_date, datetime.time.min)),
+        reservation_time__lt=timezone.make_aware(datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time.min)),
+    )
+    if designer_id:
+        queryset = queryset.filter(assigned_designer__user_id=designer_id)
+    starts, durations, counts = reservation_arrays(queryset)
+    matrix = occupancy_matrix(starts, durations, resolution, counts)
+
+    result = {
+        'store': store_id,
+        'designer': designer_id,
+        'from': start_date,
+        'to': end_date,
+        'resolution': resolution,
+        'weeks': round(((end_date - start_date).days + 1) / 7, 2),
+        'reservations': int(counts.sum()),
+        'weekdays': ['월', '화', '수', '목', '금', '토', '일'],
+        'slots': [f'{minute // 60:02d}:{minute % 60:02d}' for minute in range(0, MINUTES_PER_DAY, resolution)],
+        'occupied_minutes': matrix.tolist(),
+    }
+    cache.set(cache_key, result, HEATMAP_CACHE_SECONDS)
+    return result
+
+
+FORECAST_HISTORY_WEEKS = 12
+FORECAST_HALF_LIFE_WEEKS = 4  # 최근 주에 더 큰 가중치 (4주 전 주의 가중치는 절반)
+FORECAST_CACHE_SECONDS = 24 * 60 * 60
+TARGET_UTILIZATION = 0.8  # 디자이너 한 명이 한 시간에 실제로 시술하는 비율 목표
+UNDERSTAFFED_RATIO = 0.7  # 배치 인원이 필요 인원의 이 비율보다 적은 시간이 있으면 경고
+MIN_DEMAND_DESIGNERS = 0.25  # 평활화로 번진 작은 수요는 인원 계산에서 버립니다.
+
+
+def _epoch_day(date):
+    return (date - datetime.date(1970, 1, 1)).days
+
+
+def hourly_coverage(local_starts, durations, first_day, days, counts=None):
+    """현지 기준 분 배열의 구간들을 [first_day, first_day + days) 날짜별 x 24시간 점유 분 행렬로 묶습니다.
+
+    counts가 있으면 각 구간을 그 수만큼 겹친 것으로 셉니다.
+    """
+    origin = _epoch_day(first_day) * MINUTES_PER_DAY
+    span = days * MINUTES_PER_DAY
+    begin = local_starts - origin
+    end = np.minimum(begin + durations, span)
+    keep = (begin >= 0) & (begin < span)
+    weights = None if counts is None else counts[keep]
+    delta = np.bincount(begin[keep], weights, minlength=span + 1) - np.bincount(end[keep], weights, minlength=span + 1)
+    return np.cumsum(delta[:span]).astype(np.int64).reshape(days, 24, 60).sum(axis=2)
+
+
+def demand_forecast(store_id, start_date, days=14, refresh=False):
+    """매장의 [start_date, start_date + days) 날짜별 x 시간대 예상 점유 분을 계산합니다.
+
+    지난 FORECAST_HISTORY_WEEKS 주 예약을 요일 x 시간대로 묶어 최근 주에 가중치를 둔 평균을 내고,
+    시간대 방향으로 가우시안 평활화한 값을 요일에 맞춰 펼칩니다. 이미 잡힌 예약이 더 많으면 그 값을 씁니다.
+    결과는 매장 분석 버전과 함께 매장/날짜별로 캐시되어 매장 예약이 바뀌면 다시 계산되며,
+    compute_staffing_forecasts 명령으로 미리 계산해 둘 수 있습니다. (refresh이면 다시 계산)
+    """
+    version = cache.get(analytics_version_key(store_id), 0)
+    cache_key = f'analytics:demand:{store_id}:{version}:{start_date}:{days}'
+    cached = None if refresh else cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    weeks = FORECAST_HISTORY_WEEKS
+    history_start = start_date - datetime.timedelta(weeks=weeks)
+    end_date = start_date + datetime.timedelta(days=days)
+    starts, durations, counts = reservation_arrays(Reservation.objects.active().filter(
+        store_id=store_id,
+        reservation_time__gte=timezone.make_aware(datetime.datetime.combine(history_start, datetime.time.min)),
+        reservation_time__lt=timezone.make_aware(datetime.datetime.combine(end_date, datetime.time.min)),
+    ))
+    local_starts = _local_minutes(starts) if len(starts) else starts
+    history = hourly_coverage(local_starts, durations, history_start, weeks * 7, counts).reshape(weeks, 7, 24)
+    booked = hourly_coverage(local_starts, durations, start_date, days, counts)
+
+    # 오래된 주부터 최근 주 순서이므로 마지막 주의 가중치가 1입니다.
+    weights = 0.5 ** (np.arange(weeks - 1, -1, -1) / FORECAST_HALF_LIFE_WEEKS)
+    profile = np.tensordot(weights / weights.sum(), history, axes=1)
+    profile = gaussian_filter1d(profile, sigma=0.5, axis=1, mode='nearest')
+    # profile의 j번째 행은 history_start 요일로부터 j일 뒤의 요일입니다.
+    profile = np.roll(profile, history_start.weekday(), axis=0)
+    weekdays = [(start_date + datetime.timedelta(days=offset)).weekday() for offset in range(days)]
+    forecast = np.maximum(profile[weekdays], booked)
+
+    result = {'forecast': forecast.round(1).tolist(), 'booked': booked.tolist()}
+    cache.set(cache_key, result, FORECAST_CACHE_SECONDS)
+    return result
+
+
+def scheduled_designers(store_id, start_date, days):
+    # 근무표 기준 날짜별 x 시간대 근무 디자이너 수 (분 단위 근무 시간을 시간당 평균 인원으로 환산)
+    shifts = WorkCalendar.objects.filter(
+        store_id=store_id, status='working', staff__role='designer',
+        date__gte=start_date, date__lt=start_date + datetime.timedelta(days=days),
+    ).values_list('date', 'start_time', 'end_time')
+    local_starts = np.array([_epoch_day(date) * MINUTES_PER_DAY + start.hour * 60 + start.minute for date, start, _ in shifts], dtype=np.int64)
+    durations = np.array([(end.hour * 60 + end.minute) - (start.hour * 60 + start.minute) for _, start, end in shifts], dtype=np.int64)
+    return hourly_coverage(local_starts, durations, start_date, days) / 60
+
+
+def staffing_plan(store_id, start_date, days=14):
+    """날짜별 권장 디자이너 수와 근무표 대비 부족한 시간대를 돌려줍니다.
+
+    예상 수요는 캐시된 demand_forecast를 쓰고, 근무표는 바뀔 수 있으므로 매번 한 번의 쿼리로 읽습니다.
+    """
+    demand = demand_forecast(store_id, start_date, days)
+    forecast = np.array(demand['forecast'])
+    booked = np.array(demand['booked'])
+    needed = np.ceil(np.maximum(forecast / 60 / TARGET_UTILIZATION - MIN_DEMAND_DESIGNERS, 0))
+    scheduled = scheduled_designers(store_id, start_date, days)
+    short = (needed > 0) & (scheduled < needed * UNDERSTAFFED_RATIO)
+
+    plan = []
+    for offset in range(days):
+        date = start_date + datetime.timedelta(days=offset)
+        short_hours = np.flatnonzero(short[offset]).tolist()
+        plan.append({
+            'date': date,
+            'forecast_minutes': round(float(forecast[offset].sum()), 1),
+            'booked_minutes': int(booked[offset].sum()),
+            'recommended_designers': int(needed[offset].max()),
+            'scheduled_designers': round(float(scheduled[offset].max()), 1),
+            'peak_hour': int(forecast[offset].argmax()),
+            'understaffed': bool(short_hours),
+            'understaffed_hours': short_hours,
+            'hourly_needed': needed[offset].astype(int).tolist(),
+            'hourly_scheduled': scheduled[offset].round(1).tolist(),
+        })
+    return plan
@@ -0,0 +1,96 @@
+import datetime
+from collections import defaultdict
+from datetime import timedelta
+from django.utils import timezone
+from stores.models import WorkCalendar
+from .models import Reservation, MAX_RESERVATION_SPAN
+
+# 예약 가능 시간 계산
+# 서비스의 디자이너 전원에 대해 근무표와 기존 예약을 한 번씩만 조회한 뒤 메모리에서 슬롯을 계산합니다.
+
+DEFAULT_SLOT_INTERVAL = timedelta(minutes=30)
+
+
+def _merge_intervals(intervals):
+    # 겹치거나 맞닿은 예약 구간을 하나로 합쳐 정렬된 구간 목록을 만듭니다.
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _to_utc(date, time, tz):
+    # 비교 연산마다 시간대 변환이 일어나지 않도록 모든 시각을 UTC로 맞춥니다.
+    return timezone.make_aware(datetime.datetime.combine(date, time), tz).astimezone(datetime.timezone.utc)
+
+
+def find_available_slots(service, start_date, end_date, interval=DEFAULT_SLOT_INTERVAL, now=None):
+    """서비스를 제공할 수 있는 모든 디자이너의 예약 가능 슬롯을 반환합니다.
+
+    근무표(WorkCalendar)와 예약(Reservation)은 각각 한 번의 쿼리로 읽고,
+    디자이너별로 정렬된 예약 구간을 따라가며 슬롯을 한 번에 계산합니다.
+    """
+    now = now or timezone.now()
+    tz = timezone.get_current_timezone()
+    duration = service.duration
+    designers = {
+        staff.id: staff
+        for staff in service.available_designers.filter(store=service.store).select_related('user')
+    }
+    if not designers or duration <= timedelta(0):
+        return []
+
+    shifts = WorkCalendar.objects.filter(
+        staff_id__in=designers.keys(),
+        date__range=(start_date, end_date),
+        status='working',
+    ).values_list('staff_id', 'date', 'start_time', 'end_time').order_by('staff_id', 'date')
+
+    range_start = _to_utc(start_date, datetime.time.min, tz)
+    range_end = _to_utc(end_date + timedelta(days=1), datetime.time.min, tz)
+
+    busy = defaultdict(list)
+    reservations = Reservation.objects.active().filter(
+        assigned_designer_id__in=designers.keys(),
+        reservation_time__gte=range_start - MAX_RESERVATION_SPAN,
+        reservation_time__lt=range_end,
+        end_time__gt=range_start,
+    ).values_list('assigned_designer_id', 'reservation_time', 'end_time')
+    for staff_id, reserved_at, reserved_end in reservations:
+        busy[staff_id].append((reserved_at.astimezone(datetime.timezone.utc), reserved_end.astimezone(datetime.timezone.utc)))
+    busy = {staff_id: _merge_intervals(intervals) for staff_id, intervals in busy.items()}
+
+    slots = []
+    for staff_id, date, shift_start, shift_end in shifts:
+        staff = designers[staff_id]
+        intervals = busy.get(staff_id, [])
+        index = 0
+        slot_start = _to_utc(date, shift_start, tz)
+        shift_close = _to_utc(date, shift_end, tz)
+
+        while slot_start + duration <= shift_close:
+            slot_end = slot_start + duration
+            # 이미 끝난 예약 구간은 다시 보지 않습니다.
+            while index < len(intervals) and intervals[index][1] <= slot_start:
+                index += 1
+            if index < len(intervals) and intervals[index][0] < slot_end:
+                # 겹치는 예약이 끝나는 시점 이후의 첫 슬롯으로 건너뜁니다.
+                busy_end = intervals[index][1]
+                steps = -(-(busy_end - slot_start) // interval)
+                slot_start += interval * max(steps, 1)
+                continue
+            if slot_start >= now:
+                slots.append({
+                    'designer': staff.user_id,
+                    'designer_name': staff.user.username,
+                    'start': timezone.localtime(slot_start, tz),
+                    'end': timezone.localtime(slot_end, tz),
+                })
+            slot_start += interval
+
+    slots.sort(key=lambda slot: (slot['start'], slot['designer']))
+    return slots
@@ -0,0 +1,322 @@
+from collections import defaultdict
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from stores.models import StoreStaff, WorkCalendar
+from .customers import add_reservation_stats
+from .models import Customer, CustomerSearchGram, DesignerScheduleLock, Reservation, SaleEntry, Service, ServiceInventory, MAX_RESERVATION_SPAN, normalize_phone, touch_store_analytics
+
+
+class BookingError(Exception):
+    pass
+
+
+def _localtime(value):
+    return timezone.localtime(value) if timezone.is_aware(value) else value
+
+
+def lock_designer_days(keys):
+    """(디자이너 ID, 날짜) 잠금 행을 만들고 select_for_update로 잠급니다.
+
+    여러 요청이 같은 행들을 잠글 때 교착 상태가 생기지 않도록 항상 같은 순서로 잠급니다.
+    트랜잭션 안에서 호출해야 합니다.
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return []
+    DesignerScheduleLock.objects.bulk_create(
+        [DesignerScheduleLock(designer_id=designer_id, date=date) for designer_id, date in keys],
+        ignore_conflicts=True,
+    )
+    # 디자이너 x 날짜 전체 조합이 아니라 실제로 필요한 (디자이너, 날짜) 쌍만 잠급니다.
+    dates_by_designer = defaultdict(set)
+    for designer_id, date in keys:
+        dates_by_designer[designer_id].add(date)
+    condition = Q()
+    for designer_id, dates in dates_by_designer.items():
+        condition |= Q(designer_id=designer_id, date__in=dates)
+    return list(
+        DesignerScheduleLock.objects.select_for_update()
+        .filter(condition)
+        .order_by('designer_id', 'date')
+    )
+
+
+def designer_day_keys(designer_id, start, end):
+    # 예약 구간 [start, end)가 걸치는 현지 날짜마다의 (디자이너 ID, 날짜) 잠금 키
+    # 자정을 넘는 예약은 다음 날 잠금도 잡아 그날 예약과도 직렬화합니다.
+    first = _localtime(start).date()
+    last = _localtime(max(start, end - timedelta(microseconds=1))).date()
+    return [(designer_id, first + timedelta(days=offset)) for offset in range((last - first).days + 1)]
+
+
+def check_booking(designer, reservation_time, end_time, exclude_id=None):
+    # 해당 디자이너의 기존 예약 확인 (기존 예약 각각의 종료 시각 기준, 일정 변경이면 자기 자신은 제외)
+    if Reservation.objects.overlapping(designer, reservation_time, end_time).exclude(pk=exclude_id).exists():
+        raise BookingError('해당 시간에 이미 예약이 있습니다.')
+
+    # 디자이너의 근무 상태 확인
+    local_time = _localtime(reservation_time)
+    work_calendar = WorkCalendar.objects.filter(
+        staff=designer,
+        date=local_time.date(),
+        status='working'
+    ).first()
+
+    if not work_calendar:
+        raise BookingError('해당 날짜에 디자이너가 근무하지 않습니다.')
+
+    # 예약 시간이 근무 시간 내에 있는지 확인
+    if not (work_calendar.start_time <= local_time.time() <= work_calendar.end_time):
+        raise BookingError('예약 시간이 디자이너의 근무 시간을 벗어났습니다.')
+
+
+def book_reservation(serializer):
+    """검증된 ReservationSerializer로 예약을 생성합니다.
+
+    디자이너의 해당 날짜 잠금 행을 잡은 상태에서 중복 확인과 저장을 하므로,
+    같은 디자이너의 같은 날짜 예약만 서로 기다리고 나머지 예약은 병렬로 처리됩니다.
+    """
+    designer = serializer.validated_data.get('assigned_designer')
+    service = serializer.validated_data['service']
+    reservation_time = serializer.validated_data['reservation_time']
+    end_time = reservation_time + service.duration
+
+    if designer is None:
+        raise BookingError('예약할 디자이너를 지정해야 합니다.')
+
+    with transaction.atomic():
+        lock_designer_days(designer_day_keys(designer.id, reservation_time, end_time))
+        check_booking(designer, reservation_time, end_time)
+        return serializer.save()
+
+
+def check_reschedule(reservation, reservation_time, designer, service):
+    """기존 예약의 시간/디자이너/서비스를 바꿀 때 book_reservation과 같은 잠금과 확인을 거칩니다.
+
+    바뀐 값이 없거나 디자이너가 없으면 확인하지 않습니다. 새 날짜의 디자이너 잠금 행을 잡으므로
+    트랜잭션 안에서 호출하고, 같은 트랜잭션에서 저장해야 합니다.
+    """
+    unchanged = (
+        reservation_time == reservation.reservation_time
+        and getattr(designer, 'id', None) == reservation.assigned_designer_id
+        and service.id == reservation.service_id
+    )
+    if unchanged or designer is None:
+        return
+    end_time = reservation_time + service.duration
+    lock_designer_days(designer_day_keys(designer.id, reservation_time, end_time))
+    check_booking(designer, reservation_time, end_time, exclude_id=reservation.pk)
+
+
+def _resolve_customers(rows):
+    """행마다 고객 ID를 돌려줍니다.
+
+    정규화된 전화번호로 기존 고객을 한 번에 찾고, 없는 고객만 한 번에 생성합니다.
+    전화번호가 없는 행은 매번 새 고객으로 등록합니다.
+    """
+    digits_by_row = [normalize_phone(row.get('customer_phone_number')) for row in rows]
+    wanted = {}
+    for row, digits in zip(rows, digits_by_row):
+        if digits:
+            wanted.setdefault(digits, row)
+
+    def existing():
+        return dict(Customer.objects.filter(phone_digits__in=wanted.keys()).values_list('phone_digits', 'id'))
+
+    customers = existing()
+    missing = [
+        Customer(
+            name=row.get('customer_name') or '',
+            phone_number=row.get('customer_phone_number'),
+            phone_digits=digits,
+            phone_digits_reversed=digits[::-1],
+            gender=row.get('customer_gender') or '',
+        )
+        for digits, row in wanted.items()
+        if digits not in customers
+    ]
+    if missing:
+        # 같은 번호의 고객이 동시에 만들어졌을 수 있으므로 충돌은 무시하고,
+        # MySQL은 bulk_create 후 pk를 돌려주지 않으므로 다시 조회합니다.
+        Customer.objects.bulk_create(missing, ignore_conflicts=True)
+        customers = existing()
+        CustomerSearchGram.sync(Customer.objects.filter(phone_digits__in=[customer.phone_digits for customer in missing]).only('id', 'name'))
+
+    customer_ids = []
+    for row, digits in zip(rows, digits_by_row):
+        if digits:
+            customer_ids.append(customers[digits])
+        else:
+            customer_ids.append(Customer.objects.create(
+                name=row.get('customer_name') or '',
+                phone_number=row.get('customer_phone_number') or '',
+                gender=row.get('customer_gender') or '',
+            ).id)
+    return customer_ids
+
+
+def _fill_pks(reservations):
+    # MySQL은 bulk_create 후 pk를 돌려주지 않으므로, 겹치지 않는 예약의 (디자이너, 시작 시각)으로 다시 찾습니다.
+    missing = [reservation for reservation in reservations if reservation.pk is None]
+    if not missing:
+        return
+    pks = {
+        (designer_id, start): pk
+        for pk, designer_id, start in Reservation.objects.active().filter(
+            assigned_designer_id__in={reservation.assigned_designer_id for reservation in missing},
+            reservation_time__in={reservation.reservation_time for reservation in missing},
+        ).values_list('id', 'assigned_designer_id', 'reservation_time')
+    }
+    for reservation in missing:
+        reservation.pk = pks[(reservation.assigned_designer_id, reservation.reservation_time)]
+
+
+def bulk_book_reservations(rows, allow_partial=False, commit=True, allowed_store_ids=None):
+    """여러 예약을 한 번에 검증하고 생성합니다.
+
+    rows는 ReservationBulkItemSerializer로 검증된 데이터 목록입니다.
+    서비스, 디자이너, 근무표, 기존 예약을 영향받는 날짜에 대해 한 번씩만 읽고
+    중복 확인(배치 내부 포함)은 메모리에서 처리한 뒤 bulk_create로 저장합니다.
+    allow_partial이 아니면 오류가 하나라도 있을 때 아무것도 저장하지 않고,
+    commit=False이면 검증만 합니다. allowed_store_ids가 주어지면 그 매장의 서비스 예약만 받습니다.
+    (디자이너는 서비스 매장 직원으로만 찾으므로 디자이너 매장도 함께 제한됩니다.)
+    (생성된 예약 목록, {행 번호: 오류 메시지}) 를 반환합니다.
+    """
+    errors = {}
+    services = Service.objects.in_bulk({row['service'] for row in rows})
+    store_ids = {service.store_id for service in services.values() if service.store_id}
+    staff_by_user = {
+        (staff.user_id, staff.store_id): staff
+        for staff in StoreStaff.objects.filter(
+            user_id__in={row['assigned_designer'] for row in rows},
+            store_id__in=store_ids,
+        )
+    }
+    offered = set(
+        StoreStaff.available_services.through.objects.filter(
+            storestaff_id__in=[staff.id for staff in staff_by_user.values()],
+            service_id__in=services.keys(),
+        ).values_list('storestaff_id', 'service_id')
+    )
+
+    candidates = []
+    for index, row in enumerate(rows):
+        service = services.get(row['service'])
+        if service is None:
+            errors[index] = '존재하지 않는 서비스입니다.'
+            continue
+        if allowed_store_ids is not None and service.store_id not in allowed_store_ids:
+            errors[index] = '소속되지 않은 매장의 예약은 등록할 수 없습니다.'
+            continue
+        staff = staff_by_user.get((row['assigned_designer'], service.store_id))
+        if staff is None:
+            errors[index] = '지정된 디자이너는 해당 매장에서 등록되지 않은 상태입니다.'
+            continue
+        if (staff.id, service.id) not in offered:
+            errors[index] = '지정된 디자이너는 선택한 서비스를 제공하지 않습니다.'
+            continue
+        start = row['reservation_time']
+        candidates.append((index, row, service, staff, start, start + service.duration))
+
+    if not candidates:
+        return [], errors
+
+    with transaction.atomic():
+        lock_designer_days(key for _, _, _, staff, start, end in candidates for key in designer_day_keys(staff.id, start, end))
+
+        staff_ids = {staff.id for _, _, _, staff, _, _ in candidates}
+        shifts = {
+            (staff_id, date): (start_time, end_time)
+            for staff_id, date, start_time, end_time in WorkCalendar.objects.filter(
+                staff_id__in=staff_ids,
+                date__in={_localtime(start).date() for _, _, _, _, start, _ in candidates},
+                status='working',
+            ).values_list('staff_id', 'date', 'start_time', 'end_time')
+        }
+        busy = defaultdict(list)
+        for staff_id, start, end in Reservation.objects.active().filter(
+            assigned_designer_id__in=staff_ids,
+            reservation_time__gte=min(start for *_, start, _ in candidates) - MAX_RESERVATION_SPAN,
+            reservation_time__lt=max(end for *_, end in candidates),
+        ).values_list('assigned_designer_id', 'reservation_time', 'end_time'):
+            busy[staff_id].append((start, end))
+
+        accepted = []
+        for index, row, service, staff, start, end in candidates:
+            local_start = _localtime(start)
+            shift = shifts.get((staff.id, local_start.date()))
+            if shift is None:
+                errors[index] = '해당 날짜에 디자이너가 근무하지 않습니다.'
+                continue
+            if not (shift[0] <= local_start.time() <= shift[1]):
+                errors[index] = '예약 시간이 디자이너의 근무 시간을 벗어났습니다.'
+                continue
+            if any(busy_start < end and busy_end > start for busy_start, busy_end in busy[staff.id]):
+                errors[index] = '해당 시간에 이미 예약이 있습니다.'
+                continue
+            # 같은 배치 안의 예약끼리도 겹치지 않도록 바로 반영합니다.
+            busy[staff.id].append((start, end))
+            accepted.append((row, service, staff, start, end))
+
+        if not accepted or not commit or (errors and not allow_partial):
+            return [], errors
+
+        customer_ids = _resolve_customers([row for row, *_ in accepted])
+        reservations = [
+            Reservation(
+                customer_id=customer_id,
+                customer_name=row.get('customer_name'),
+                customer_phone_number=row.get('customer_phone_number'),
+                customer_gender=row.get('customer_gender'),
+                service=service,
+                store_id=service.store_id,
+                assigned_designer=staff,
+                reservation_time=start,
+                end_time=end,
+                status=row['status'],
+            )
+            for customer_id, (row, service, staff, start, end) in zip(customer_ids, accepted)
+        ]
+        Reservation.objects.bulk_create(reservations, batch_size=500)
+        completed = [reservation for reservation in reservations if reservation.status == '방문 완료']
+        _fill_pks(completed)
+        entries = SaleEntry.record_new(completed)
+        ServiceInventory.consume(entries)
+        add_reservation_stats(reservations, entries)
+        transaction.on_commit(lambda: touch_store_analytics(reservation.store_id for reservation in reservations))
+    return reservations, errors
+
+
+def complete_reservations(queryset):
+    """queryset의 예약 중/예약 대기 예약을 한 번에 방문 완료 처리합니다. (영업 마감 일괄 처리용)
+
+    예약 행을 잠근 뒤 상태를 UPDATE 한 번으로 바꾸고, 매출 원장 기록, 시술 재고 차감(아이템마다 UPDATE 한 번),
+    고객 통계 반영을 같은 트랜잭션에서 처리합니다. 이미 방문 완료된 예약은 건너뛰므로 여러 번 호출해도 한 번만 반영됩니다.
+    방문 완료 처리한 예약 목록을 반환합니다.
+    """
+    with transaction.atomic():
+        reservations = list(
+            # 뷰 쿼리셋의 select_related 조인을 빼고 예약 행만 잠급니다. (고객/서비스/사용자 행까지 잠그지 않도록)
+            queryset.filter(status__in=('예약 중', '예약 대기'))
+            .select_related(None)
+            .select_for_update()
+            .order_by('id')
+            .prefetch_related('service')
+        )
+        if not reservations:
+            return []
+        ids = [reservation.id for reservation in reservations]
+        Reservation.objects.filter(id__in=ids).update(status='방문 완료')
+        for reservation in reservations:
+            reservation.status = '방문 완료'
+
+        # 방문 완료가 취소된 적이 있는 예약은 다음 revision으로 기록해야 하므로 하나씩 기록합니다.
+        recorded = set(SaleEntry.objects.filter(reservation_id__in=ids).values_list('reservation_id', flat=True))
+        entries = SaleEntry.record_new([reservation for reservation in reservations if reservation.id not in recorded])
+        entries += filter(None, (SaleEntry.record(reservation) for reservation in reservations if reservation.id in recorded))
+        ServiceInventory.consume(entries)
+        add_reservation_stats([], entries)
+        transaction.on_commit(lambda: touch_store_analytics(reservation.store_id for reservation in reservations))
+    return reservations
@@ -0,0 +1,191 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Left
+from django.db.models.lookups import Exact
+from rest_framework import serializers
+from .models import Customer, CustomerSearchGram, Reservation, SaleEntry, name_grams, normalize_name, normalize_phone
+
+TYPEAHEAD_DEFAULT_LIMIT = 10
+TYPEAHEAD_MAX_LIMIT = 20
+# 전화번호 접두어에 일치하는 고객이 이보다 적으면 모두 읽어 정렬하고, 많으면 예약 수 인덱스 순서로 훑습니다.
+TYPEAHEAD_SORT_ROWS = 4000
+
+_PHONE_QUERY_CHARS = set('0123456789- ')
+
+
+def _prefix_range(field, digits):
+    # 숫자 접두어 검색을 LIKE 대신 범위 조건으로 표현해 어떤 DB에서도 인덱스 범위 조회가 되도록 합니다.
+    # (':'는 ASCII에서 '9' 바로 다음 문자)
+    return Q(**{f'{field}__gte': digits, f'{field}__lt': digits + ':'})
+
+
+def search_customers(query):
+    """전화번호 일부 또는 이름 일부로 고객을 찾는 쿼리셋을 반환합니다.
+
+    숫자로만 된 검색어는 전화번호 앞자리(phone_digits)와 뒷자리(phone_digits_reversed)
+    인덱스의 접두어 검색으로, 그 외 검색어는 이름 2-gram 색인으로 후보를 좁힌 뒤 확인합니다.
+    """
+    query = (query or '').strip()
+    digits = normalize_phone(query)
+    if digits and set(query) <= _PHONE_QUERY_CHARS:
+        return Customer.objects.filter(_prefix_range('phone_digits', digits) | _prefix_range('phone_digits_reversed', digits[::-1]))
+
+    name = normalize_name(query)
+    if not name:
+        return Customer.objects.none()
+    if len(name) == 1:
+        return Customer.objects.filter(name__startswith=query)
+
+    grams = name_grams(name)
+    matching = (
+        CustomerSearchGram.objects.filter(gram__in=grams)
+        .values('customer_id')
+        .annotate(hits=Count('gram', distinct=True))
+        .filter(hits=len(grams))
+        .values('customer_id')
+    )
+    return Customer.objects.filter(id__in=matching, name__icontains=query)
+
+
+_DATETIME_FIELD = serializers.DateTimeField()
+
+TYPEAHEAD_FIELDS = ('id', 'name', 'phone_number', 'gender', 'is_membership', 'reservation_count', 'visit_count', 'last_visit_at')
+
+
+def _top_customers(matches, scanned, limit, counted=None):
+    # 예약 수 순 상위 limit 명. matches와 scanned는 같은 고객을 고르는 쿼리셋으로, matches는 인덱스로 후보를 찾고
+    # scanned는 인덱스를 쓸 수 없는 조건입니다. 일치하는 고객이 적으면 matches로 모두 찾아 정렬하고, 많으면 scanned로
+    # DB가 예약 수 인덱스 순서로 읽으며 확인하다 limit에서 멈추게 합니다. (어느 쪽이든 정확한 상위 limit 명입니다.)
+    # 일치하는 고객 수는 counted(기본은 matches)를 TYPEAHEAD_SORT_ROWS 건까지만 읽어 확인합니다.
+    counted = matches if counted is None else counted
+    if counted.values('pk')[:TYPEAHEAD_SORT_ROWS].count() >= TYPEAHEAD_SORT_ROWS:
+        matches = scanned
+    return list(matches.order_by(*CUSTOMER_ORDERINGS['reservation_count']).values(*TYPEAHEAD_FIELDS)[:limit])
+
+
+def _top_customers_by_prefix(field, digits, limit):
+    return _top_customers(
+        Customer.objects.filter(_prefix_range(field, digits)),
+        Customer.objects.filter(Exact(Left(field, len(digits)), digits)),
+        limit,
+    )
+
+
+def typeahead_customers(query, limit=TYPEAHEAD_DEFAULT_LIMIT):
+    """자동완성용 상위 고객 목록을 반환합니다.
+
+    전화번호 뒷자리/앞자리(또는 이름) 조회마다 DB에서 예약 수 순으로 정렬한 상위 limit 건을 받으므로,
+    두 목록을 합쳐 다시 정렬한 결과는 정확한 상위 limit 건입니다.
+    """
+    query = (query or '').strip()
+    digits = normalize_phone(query)
+    name = normalize_name(query)
+    if digits and set(query) <= _PHONE_QUERY_CHARS:
+        candidates = _top_customers_by_prefix('phone_digits_reversed', digits[::-1], limit) + _top_customers_by_prefix('phone_digits', digits, limit)
+    elif len(name) == 2:
+        # 두 글자 이름은 2-gram 하나로 찾으므로 그 gram의 행 수가 곧 일치하는 고객 수입니다.
+        # (2-gram 색인은 후보를 좁힐 뿐이고 최종 조건은 name__icontains이므로 두 쿼리셋은 같은 고객을 고릅니다.)
+        candidates = _top_customers(
+            search_customers(query), Customer.objects.filter(name__icontains=query), limit,
+            counted=CustomerSearchGram.objects.filter(gram=name),
+        )
+    elif len(name) == 1 and name.upper() == name:
+        # 대소문자가 없는 한 글자(한글 성 등)는 startswith와 같은 범위 조건으로 이름 인덱스를 씁니다.
+        # (sqlite의 LIKE는 대소문자를 무시해 인덱스를 쓰지 못합니다.)
+        candidates = _top_customers(
+            Customer.objects.filter(name__gte=name, name__lt=chr(ord(name) + 1)), Customer.objects.filter(name__startswith=name), limit
+        )
+    else:
+        candidates = list(search_customers(query).order_by(*CUSTOMER_ORDERINGS['reservation_count']).values(*TYPEAHEAD_FIELDS)[:limit])
+
+    unique = {customer['id']: customer for customer in candidates}
+    customers = sorted(unique.values(), key=lambda customer: (-customer['reservation_count'], customer['id']))[:limit]
+    # values() 행은 시리얼라이저를 거치지 않으므로 CustomerSerializer와 같은 형식(현지 시각)으로 바꿉니다.
+    for customer in customers:
+        customer['last_visit_at'] = _DATETIME_FIELD.to_representation(customer['last_visit_at']) if customer['last_visit_at'] else None
+    return customers
+
+
+CUSTOMER_ORDERINGS = {
+    'reservation_count': ('-reservation_count', 'id'),
+    'visit_count': ('-visit_count', 'id'),
+    'last_visit': (F('last_visit_at').desc(nulls_last=True), 'id'),
+    'lifetime_spend': ('-lifetime_spend', 'id'),
+}
+
+
+def add_reservation_stats(reservations, entries=()):
+    """bulk_create로 새로 만든 예약들과 그 매출 원장 항목들을 고객 통계에 반영합니다.
+
+    Reservation.save를 거치지 않는 일괄 생성/일괄 방문 완료 경로용으로, 고객별로 합산한 뒤
+    고객마다 UPDATE 한 번씩 F() 증감으로 반영합니다.
+    """
+    deltas = defaultdict(lambda: {'reservations': 0, 'visits': 0, 'spend': Decimal('0'), 'last_visit': None})
+    for reservation in reservations:
+        if reservation.status != '예약 취소':
+            deltas[reservation.customer_id]['reservations'] += 1
+    for entry in entries:
+        delta = deltas[entry.customer_id]
+        delta['visits'] += 1
+        delta['spend'] += entry.revenue
+        delta['last_visit'] = max(filter(None, [delta['last_visit'], entry.sold_at]))
+
+    for customer_id, delta in deltas.items():
+        updates = {}
+        if delta['reservations']:
+            updates['reservation_count'] = F('reservation_count') + delta['reservations']
+        if delta['visits']:
+            updates['visit_count'] = F('visit_count') + delta['visits']
+            updates['lifetime_spend'] = F('lifetime_spend') + delta['spend']
+            updates['last_visit_at'] = Greatest(Coalesce(F('last_visit_at'), Value(delta['last_visit'])), Value(delta['last_visit']))
+        if updates:
+            Customer.objects.filter(pk=customer_id).update(**updates)
+
+
+def reconcile_customer_stats(start_id, end_id, dry_run=False):
+    """id 범위 [start_id, end_id) 고객의 통계를 예약 테이블에서 다시 집계해 어긋난 값만 고칩니다.
+
+    범위의 고객 행을 먼저 잠근 뒤 집계하므로, 그 사이 상태 변경의 F() 증감은 잠금이 풀린 뒤
+    고친 값 위에 더해지고 사라지지 않습니다. 고친(dry_run이면 고칠) 고객 수를 반환합니다.
+    """
+    with transaction.atomic():
+        customers = Customer.objects.filter(id__gte=start_id, id__lt=end_id).order_by('id').only(
+            'id', 'reservation_count', 'visit_count', 'last_visit_at', 'lifetime_spend'
+        )
+        if not dry_run:
+            customers = customers.select_for_update()
+        customers = list(customers)
+
+        counted = {
+            row['customer_id']: row
+            for row in Reservation.objects.filter(customer_id__gte=start_id, customer_id__lt=end_id)
+            .exclude(status='예약 취소')
+            .values('customer_id')
+            .annotate(
+                reservations=Count('id'),
+                visits=Count('id', filter=Q(status='방문 완료')),
+                last_visit=Max('reservation_time', filter=Q(status='방문 완료')),
+            )
+        }
+        # 누적 결제액은 매출 원장에서 합산합니다. (취소된 방문은 VOID 항목이 상쇄)
+        spent = dict(
+            SaleEntry.objects.filter(customer_id__gte=start_id, customer_id__lt=end_id)
+            .values('customer_id')
+            .annotate(total=Sum('revenue'))
+            .values_list('customer_id', 'total')
+        )
+
+        stale = []
+        for customer in customers:
+            row = counted.get(customer.id, {})
+            spend = spent.get(customer.id) or Decimal('0')
+            expected = (row.get('reservations', 0), row.get('visits', 0), row.get('last_visit'), spend)
+            if (customer.reservation_count, customer.visit_count, customer.last_visit_at, customer.lifetime_spend) != expected:
+                customer.reservation_count, customer.visit_count, customer.last_visit_at, customer.lifetime_spend = expected
+                stale.append(customer)
+
+        if stale and not dry_run:
+            Customer.objects.bulk_update(stale, ['reservation_count', 'visit_count', 'last_visit_at', 'lifetime_spend'], batch_size=500)
+    return len(stale)
@@ -0,0 +1,86 @@
+import datetime
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from service.availability import find_available_slots
+from service.models import Customer, Reservation, Service
+from stores.models import Category, Store, StoreStaff, WorkCalendar
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = '예약 가능 시간 계산 벤치마크 (임시 데이터를 만들어 측정한 뒤 롤백합니다)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--designers', type=int, default=50)
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--reservations-per-day', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        designers_count = options['designers']
+        days = options['days']
+        start_date = timezone.localdate() + timedelta(days=1)
+        end_date = start_date + timedelta(days=days - 1)
+
+        ceo = User.objects.create(username='bench_ceo', email='bench_ceo@example.com', phone='010-0000-0000', birthday=datetime.date(1990, 1, 1), role='CEO')
+        store = Store.objects.create(name='bench_store', ceo=ceo)
+        category = Category.objects.create(name='bench')
+        service = Service.objects.create(category=category, name='bench_cut', price=Decimal('20000'), duration=timedelta(minutes=60), store=store)
+        customer = Customer.objects.create(name='bench', gender='F', phone_number='010-0000-0001')
+
+        User.objects.bulk_create([
+            User(username=f'bench_designer_{i}', email=f'bench_designer_{i}@example.com', phone=f'010-1{i:03d}-0000', birthday=datetime.date(1990, 1, 1), role='designer')
+            for i in range(designers_count)
+        ])
+        users = list(User.objects.filter(username__startswith='bench_designer_'))
+        StoreStaff.objects.bulk_create([StoreStaff(store=store, user=user, role='designer') for user in users])
+        staff = list(StoreStaff.objects.filter(store=store))
+        service.available_designers.set(staff)
+
+        shifts = []
+        reservations = []
+        for member in staff:
+            for offset in range(days):
+                date = start_date + timedelta(days=offset)
+                shifts.append(WorkCalendar(staff=member, store=store, date=date, start_time=datetime.time(10), end_time=datetime.time(20)))
+                for _ in range(options['reservations_per_day']):
+                    reserved_at = timezone.make_aware(datetime.datetime.combine(date, datetime.time(rng.randint(10, 18), rng.choice([0, 30]))))
+                    reservations.append(Reservation(customer=customer, service=service, assigned_designer=member, reservation_time=reserved_at, end_time=reserved_at + service.duration, status='예약 중'))
+        WorkCalendar.objects.bulk_create(shifts, batch_size=1000)
+        Reservation.objects.bulk_create(reservations, batch_size=1000)
+
+        self.stdout.write(f'designers={designers_count} days={days} shifts={len(shifts)} reservations={len(reservations)}')
+
+        timings = []
+        for _ in range(options['repeat']):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                slots = find_available_slots(service, start_date, end_date)
+                timings.append(time.perf_counter() - started)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'slots={len(slots)} queries={len(queries)} '
+            f'best={min(timings) * 1000:.1f}ms avg={sum(timings) / len(timings) * 1000:.1f}ms'
+        ))
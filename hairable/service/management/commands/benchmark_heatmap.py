@@ -0,0 +1,97 @@
+import datetime
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from service.analytics import occupancy_matrix, reservation_arrays, store_heatmap
+from service.models import Customer, Reservation, Service, analytics_version_key
+from stores.models import Category, Store, StoreStaff
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = '요일 x 시간대 히트맵 계산 벤치마크 (임시 예약을 만들어 측정한 뒤 롤백합니다)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reservations', type=int, default=1_000_000)
+        parser.add_argument('--designers', type=int, default=20)
+        parser.add_argument('--weeks', type=int, default=52)
+        parser.add_argument('--resolution', type=int, default=15)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        end_date = timezone.localdate() - timedelta(days=1)
+        start_date = end_date - timedelta(weeks=options['weeks']) + timedelta(days=1)
+        days = (end_date - start_date).days + 1
+
+        ceo = User.objects.create(username='bench_ceo', email='bench_ceo@example.com', phone='010-0000-0000', birthday=datetime.date(1990, 1, 1), role='CEO')
+        store = Store.objects.create(name='bench_store', ceo=ceo)
+        category = Category.objects.create(name='bench')
+        service = Service.objects.create(category=category, name='bench_cut', price=Decimal('20000'), duration=timedelta(minutes=60), store=store)
+        customer = Customer.objects.create(name='bench', gender='F', phone_number='010-0000-0001')
+        User.objects.bulk_create([
+            User(username=f'bench_designer_{i}', email=f'bench_designer_{i}@example.com', phone=f'010-1{i:03d}-0000', birthday=datetime.date(1990, 1, 1), role='designer')
+            for i in range(options['designers'])
+        ])
+        StoreStaff.objects.bulk_create([
+            StoreStaff(store=store, user=user, role='designer') for user in User.objects.filter(username__startswith='bench_designer_')
+        ])
+        staff_ids = list(StoreStaff.objects.filter(store=store).values_list('id', flat=True))
+
+        started = time.perf_counter()
+        remaining = options['reservations']
+        while remaining:
+            batch = []
+            for _ in range(min(remaining, 10000)):
+                date = start_date + timedelta(days=rng.randrange(days))
+                reserved_at = timezone.make_aware(datetime.datetime.combine(date, datetime.time(rng.randint(9, 20), rng.choice([0, 15, 30, 45]))))
+                batch.append(Reservation(
+                    customer=customer, service=service, store=store, assigned_designer_id=rng.choice(staff_ids),
+                    reservation_time=reserved_at, end_time=reserved_at + timedelta(minutes=rng.choice([30, 60, 90, 120])), status='예약 중',
+                ))
+            Reservation.objects.bulk_create(batch, batch_size=2000)
+            remaining -= len(batch)
+        self.stdout.write(f'reservations={options["reservations"]} weeks={options["weeks"]} seeded in {time.perf_counter() - started:.1f}s')
+
+        queryset = Reservation.objects.filter(store=store)
+        fetch_timings, compute_timings = [], []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            starts, durations, counts = reservation_arrays(queryset)
+            fetched = time.perf_counter()
+            occupancy_matrix(starts, durations, options['resolution'], counts)
+            fetch_timings.append(fetched - started)
+            compute_timings.append(time.perf_counter() - fetched)
+
+        cache.delete(analytics_version_key(store.id))
+        started = time.perf_counter()
+        store_heatmap(store.id, start_date, end_date, resolution=options['resolution'])
+        cold = time.perf_counter() - started
+        started = time.perf_counter()
+        store_heatmap(store.id, start_date, end_date, resolution=options['resolution'])
+        warm = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'grouped rows={len(starts)} fetch best={min(fetch_timings) * 1000:.0f}ms compute best={min(compute_timings) * 1000:.0f}ms '
+            f'heatmap cold={cold * 1000:.0f}ms cached={warm * 1000:.1f}ms'
+        ))
@@ -0,0 +1,95 @@
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from service.customers import CUSTOMER_ORDERINGS, TYPEAHEAD_DEFAULT_LIMIT, search_customers, typeahead_customers
+from service.models import Customer, CustomerSearchGram, name_grams
+
+SURNAMES = '김이박최정강조윤장임한오서신권황안송류홍'
+GIVEN_NAME_SYLLABLES = '민서지현준우예하도윤수진영성은주연동혁재아'
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = '고객 자동완성 응답 시간 벤치마크 (임시 고객을 만들어 측정한 뒤 롤백합니다)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=300)
+        parser.add_argument('--target-ms', type=float, default=20)
+        parser.add_argument('--verify', action='store_true', help='결과가 전체 정렬한 상위 목록과 같은지도 확인 (느림)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        # 실제 고객 번호와 겹치지 않도록 019 번호를 씁니다.
+        numbers = rng.sample(range(10 ** 8), options['customers'])
+        sampled = set(rng.sample(range(len(numbers)), min(len(numbers), 50)))
+        samples = []
+        started = time.perf_counter()
+        for offset in range(0, len(numbers), 10000):
+            customers = []
+            for index, number in enumerate(numbers[offset:offset + 10000], start=offset):
+                digits = f'019{number:08d}'
+                name = rng.choice(SURNAMES) + rng.choice(GIVEN_NAME_SYLLABLES) + rng.choice(GIVEN_NAME_SYLLABLES)
+                customers.append(Customer(
+                    name=name, gender='F', phone_number=f'019-{digits[3:7]}-{digits[7:]}', phone_digits=digits, phone_digits_reversed=digits[::-1],
+                    reservation_count=int(rng.paretovariate(1.5)) - 1,
+                ))
+                if index in sampled:
+                    samples.append((digits, name))
+            Customer.objects.bulk_create(customers, batch_size=2000)
+            created = Customer.objects.filter(phone_digits__in=[customer.phone_digits for customer in customers]).values_list('id', 'name')
+            CustomerSearchGram.objects.bulk_create(
+                [CustomerSearchGram(customer_id=customer_id, gram=gram) for customer_id, name in created for gram in name_grams(name)],
+                batch_size=5000,
+            )
+        self.stdout.write(f'customers={len(numbers)} seeded in {time.perf_counter() - started:.1f}s')
+
+        queries = []
+        for _ in range(options['queries']):
+            digits, name = rng.choice(samples)
+            kind = rng.choice(['phone prefix', 'phone suffix', 'name'])
+            if kind == 'phone prefix':
+                query = digits[:rng.randint(1, len(digits))]
+            elif kind == 'phone suffix':
+                query = digits[-rng.randint(1, 4):]
+            else:
+                start = rng.randrange(len(name))
+                query = name[start:start + rng.randint(1, len(name) - start)]
+            queries.append((kind, query))
+
+        timings = {}
+        mismatches = 0
+        for kind, query in queries:
+            typeahead_customers(query)
+            started = time.perf_counter()
+            result = typeahead_customers(query)
+            timings.setdefault(kind, []).append(time.perf_counter() - started)
+            if options['verify']:
+                expected = search_customers(query).order_by(*CUSTOMER_ORDERINGS['reservation_count']).values_list('id', flat=True)[:TYPEAHEAD_DEFAULT_LIMIT]
+                mismatches += [customer['id'] for customer in result] != list(expected)
+
+        target = options['target_ms'] / 1000
+        for kind, values in [*timings.items(), ('all', [value for values in timings.values() for value in values])]:
+            values = sorted(values)
+            p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+            slow = sum(value > target for value in values)
+            self.stdout.write(
+                f'{kind}: queries={len(values)} median={statistics.median(values) * 1000:.1f}ms '
+                f'p95={p95 * 1000:.1f}ms max={values[-1] * 1000:.1f}ms over {options["target_ms"]:g}ms={slow}'
+            )
+        style = self.style.SUCCESS if p95 <= target else self.style.ERROR
+        self.stdout.write(style(f'p95={p95 * 1000:.1f}ms target={options["target_ms"]:g}ms' + (f' mismatches={mismatches}' if options['verify'] else '')))
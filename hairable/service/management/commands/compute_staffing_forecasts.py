@@ -0,0 +1,26 @@
+import time
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from service.analytics import demand_forecast
+from stores.models import Store
+
+
+class Command(BaseCommand):
+    help = '매장별 시간대 수요 예측을 미리 계산해 캐시에 넣습니다 (매일 새벽 실행 권장)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', type=int, action='append', dest='stores', help='대상 매장 ID (여러 번 지정 가능, 생략하면 전체)')
+        parser.add_argument('--days', type=int, default=14)
+
+    def handle(self, *args, **options):
+        start_date = timezone.localdate()
+        stores = Store.objects.order_by('id')
+        if options['stores']:
+            stores = stores.filter(id__in=options['stores'])
+        store_ids = list(stores.values_list('id', flat=True))
+
+        started = time.perf_counter()
+        for done, store_id in enumerate(store_ids, 1):
+            demand_forecast(store_id, start_date, options['days'], refresh=True)
+            self.stdout.write(f'[{done}/{len(store_ids)}] 매장 {store_id} 예측 완료 ({time.perf_counter() - started:.1f}s)')
+        self.stdout.write(self.style.SUCCESS(f'완료: 매장 {len(store_ids)}곳'))
@@ -0,0 +1,66 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils.dateparse import parse_date
+from service.reports import rebuild_store_reports
+from stores.models import Store
+
+
+def _init_worker():
+    # spawn 방식 플랫폼에서는 자식 프로세스에서 Django를 다시 초기화해야 합니다.
+    import django
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = '매출 원장에서 매장별 일별 매출 보고서를 다시 집계합니다 (여러 번 실행해도 안전합니다)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--store', type=int, action='append', dest='stores', help='대상 매장 ID (여러 번 지정 가능, 생략하면 전체)')
+        parser.add_argument('--from', dest='start_date', help='시작 날짜 (YYYY-MM-DD)')
+        parser.add_argument('--to', dest='end_date', help='종료 날짜 (YYYY-MM-DD)')
+        parser.add_argument('--workers', type=int, default=4, help='동시에 처리할 매장 수 (1이면 현재 프로세스에서 처리)')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        start_date = self.parse_bound(options['start_date'])
+        end_date = self.parse_bound(options['end_date'])
+        stores = Store.objects.order_by('id')
+        if options['stores']:
+            stores = stores.filter(id__in=options['stores'])
+        store_ids = list(stores.values_list('id', flat=True))
+        if not store_ids:
+            raise CommandError('대상 매장이 없습니다.')
+
+        started = time.perf_counter()
+        args = (start_date, end_date, options['chunk_size'])
+        if options['workers'] <= 1 or len(store_ids) == 1:
+            results = (rebuild_store_reports(store_id, *args) for store_id in store_ids)
+            self.report(results, len(store_ids), started)
+        else:
+            # 자식 프로세스가 부모의 DB 연결을 나눠 쓰지 않도록 fork 전에 닫아 둡니다.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+                futures = [pool.submit(rebuild_store_reports, store_id, *args) for store_id in store_ids]
+                self.report((future.result() for future in as_completed(futures)), len(store_ids), started)
+
+    def parse_bound(self, value):
+        if value is None:
+            return None
+        date = parse_date(value)
+        if date is None:
+            raise CommandError(f'잘못된 날짜 형식입니다: {value}')
+        return date
+
+    def report(self, results, total, started):
+        days = 0
+        for done, result in enumerate(results, 1):
+            days += result['days']
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"[{done}/{total}] 매장 {result['store_id']}: {result['days']}일 집계, "
+                f"원장 보정 {result['repaired']}건, 생성 {result['created']} / 수정 {result['updated']} / 삭제 {result['deleted']} "
+                f"({days / elapsed:.0f}일/s)"
+            )
+        self.stdout.write(self.style.SUCCESS(f'완료: 매장 {total}곳, {days}일 ({time.perf_counter() - started:.1f}s)'))
@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from service.customers import reconcile_customer_stats
+from service.models import Customer
+
+
+class Command(BaseCommand):
+    help = '고객별 예약 수, 방문 수, 최근 방문, 누적 결제액을 예약 기록에서 다시 집계해 어긋난 값을 바로잡습니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='한 번에 다시 집계할 고객 id 범위')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        max_id = Customer.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        fixed = 0
+        started = time.perf_counter()
+        for start_id in range(1, max_id + 1, chunk_size):
+            with transaction.atomic():
+                fixed += reconcile_customer_stats(start_id, start_id + chunk_size, dry_run=options['dry_run'])
+            done = min(start_id + chunk_size - 1, max_id)
+            self.stdout.write(f'{done}/{max_id} id 처리, 어긋난 고객 {fixed}명 ({time.perf_counter() - started:.1f}s)')
+
+        verb = '발견' if options['dry_run'] else '수정'
+        self.stdout.write(self.style.SUCCESS(f'완료: 어긋난 고객 {fixed}명 {verb}'))
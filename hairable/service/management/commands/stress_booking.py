@@ -0,0 +1,126 @@
+import datetime
+import random
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from django.utils import timezone
+from service.booking import BookingError, book_reservation
+from service.models import Customer, Reservation, Service, normalize_phone
+from service.serializers import ReservationSerializer
+from stores.models import Category, Store, StoreStaff, WorkCalendar
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = '여러 스레드에서 동시에 예약을 넣어 중복 예약이 생기지 않는지 확인합니다 (직접 만든 임시 데이터만 끝나면 삭제합니다)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--attempts', type=int, default=100, help='스레드당 예약 시도 횟수')
+        parser.add_argument('--designers', type=int, default=4)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        # 여러 스레드가 각자 커밋해야 하므로 롤백으로 되돌릴 수 없습니다. 대신 만든 행의 pk만 기록해 두고 그 행만 지웁니다.
+        # (이름 접두어로 지우면 같은 접두어의 실제 데이터까지 지울 수 있습니다.)
+        self.created = {'users': [], 'categories': []}
+        phones = [self.customer_phone(index, attempt) for index in range(options['threads']) for attempt in range(options['attempts'])]
+        existing_customers = set(Customer.objects.filter(phone_digits__in=[normalize_phone(phone) for phone in phones]).values_list('id', flat=True))
+        try:
+            service, users, date = self.create_fixture(options['designers'])
+            self.run(service, users, date, options)
+        finally:
+            # 대표를 지우면 매장, 서비스, 직원, 근무표, 예약이 함께 지워집니다.
+            User.objects.filter(id__in=self.created['users']).delete()
+            Category.objects.filter(id__in=self.created['categories']).delete()
+            Customer.objects.filter(phone_digits__in=[normalize_phone(phone) for phone in phones]).exclude(id__in=existing_customers).delete()
+
+    @staticmethod
+    def customer_phone(index, attempt):
+        return f'010-8{index:03d}-{attempt:04d}'
+
+    def create_fixture(self, designers_count):
+        date = timezone.localdate() + timedelta(days=1)
+        ceo = User.objects.create(username='stress_ceo', email='stress_ceo@example.com', phone='010-9999-9999', birthday=datetime.date(1990, 1, 1), role='CEO')
+        self.created['users'].append(ceo.id)
+        store = Store.objects.create(name='stress_store', ceo=ceo)
+        category = Category.objects.create(name='stress')
+        self.created['categories'].append(category.id)
+        service = Service.objects.create(category=category, name='stress_cut', price=Decimal('20000'), duration=timedelta(minutes=60), store=store)
+        users = []
+        for i in range(designers_count):
+            user = User.objects.create(username=f'stress_designer_{i}', email=f'stress_designer_{i}@example.com', phone=f'010-9{i:03d}-0000', birthday=datetime.date(1990, 1, 1), role='designer')
+            self.created['users'].append(user.id)
+            staff = StoreStaff.objects.create(store=store, user=user, role='designer')
+            staff.available_services.add(service)
+            service.available_designers.add(staff)
+            WorkCalendar.objects.create(staff=staff, store=store, date=date, start_time=datetime.time(9), end_time=datetime.time(21))
+            users.append(user)
+        return service, users, date
+
+    def run(self, service, users, date, options):
+        results = Counter()
+        results_lock = threading.Lock()
+        # 30분 간격 슬롯에 60분짜리 서비스를 넣으므로 이웃한 슬롯끼리도 서로 겹칩니다.
+        slots = [
+            timezone.make_aware(datetime.datetime.combine(date, datetime.time(9))) + timedelta(minutes=30 * i)
+            for i in range(24)
+        ]
+
+        def worker(index):
+            rng = random.Random(options['seed'] + index)
+            local = Counter()
+            try:
+                for attempt in range(options['attempts']):
+                    serializer = ReservationSerializer(data={
+                        'service': service.id,
+                        'assigned_designer': rng.choice(users).id,
+                        'reservation_time': rng.choice(slots).isoformat(),
+                        'customer_name': f'stress_{index}',
+                        'customer_phone_number': self.customer_phone(index, attempt),
+                        'customer_gender': 'F',
+                        'status': '예약 중',
+                    })
+                    serializer.is_valid(raise_exception=True)
+                    try:
+                        book_reservation(serializer)
+                        local['booked'] += 1
+                    except BookingError:
+                        local['conflict'] += 1
+                    except DatabaseError:
+                        local['db_error'] += 1
+            finally:
+                connection.close()
+                with results_lock:
+                    results.update(local)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        double_bookings = 0
+        intervals = Reservation.objects.filter(service=service).order_by('assigned_designer_id', 'reservation_time').values_list('assigned_designer_id', 'reservation_time', 'end_time')
+        previous = None
+        for designer_id, start, end in intervals:
+            if previous and previous[0] == designer_id and start < previous[2]:
+                double_bookings += 1
+            previous = (designer_id, start, end)
+
+        attempts = options['threads'] * options['attempts']
+        self.stdout.write(
+            f"attempts={attempts} booked={results['booked']} conflicts={results['conflict']} "
+            f"db_errors={results['db_error']} elapsed={elapsed:.2f}s "
+            f"throughput={attempts / elapsed:.1f} attempts/s, {results['booked'] / elapsed:.1f} bookings/s"
+        )
+        style = self.style.SUCCESS if double_bookings == 0 else self.style.ERROR
+        self.stdout.write(style(f'double_bookings={double_bookings}'))
@@ -0,0 +1,37 @@
+# Generated by Django 4.2 on 2026-10-18 22:41
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_end_time(apps, schema_editor):
+    Reservation = apps.get_model('service', 'Reservation')
+    Service = apps.get_model('service', 'Service')
+    for service_id, duration in Service.objects.values_list('id', 'duration'):
+        Reservation.objects.filter(service_id=service_id).update(end_time=F('reservation_time') + duration)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0004_delete_managementcalendar'),
+        ('service', '0013_alter_reservation_customer_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='end_time',
+            field=models.DateTimeField(editable=False, help_text='예약 종료 시각 (예약 시각 + 서비스 소요 시간)', null=True),
+        ),
+        migrations.RunPython(fill_end_time, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='reservation',
+            name='end_time',
+            field=models.DateTimeField(editable=False, help_text='예약 종료 시각 (예약 시각 + 서비스 소요 시간)'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['assigned_designer', 'reservation_time', 'end_time'], name='reservation_designer_span_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-18 13:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0004_delete_managementcalendar'),
+        ('service', '0014_reservation_end_time'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DesignerScheduleLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('designer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_locks', to='stores.storestaff')),
+            ],
+            options={
+                'unique_together': {('designer', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 13:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0015_designerschedulelock'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['reservation_time', 'id'], name='reservation_time_id_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-18 13:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_store(apps, schema_editor):
+    Reservation = apps.get_model('service', 'Reservation')
+    Service = apps.get_model('service', 'Service')
+    for service_id, store_id in Service.objects.exclude(store=None).values_list('id', 'store_id'):
+        Reservation.objects.filter(service_id=service_id).update(store_id=store_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0004_delete_managementcalendar'),
+        ('service', '0016_reservation_time_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservation',
+            name='store',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='stores.store'),
+        ),
+        migrations.RunPython(fill_store, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['store', 'reservation_time'], name='reservation_store_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['store', 'status', 'reservation_time'], name='reservation_store_status_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2 on 2026-10-18 13:41
+
+import re
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_search_fields(apps, schema_editor):
+    Customer = apps.get_model('service', 'Customer')
+    CustomerSearchGram = apps.get_model('service', 'CustomerSearchGram')
+    last_id = 0
+    while True:
+        customers = list(Customer.objects.filter(id__gt=last_id).order_by('id')[:1000])
+        if not customers:
+            break
+        grams = []
+        for customer in customers:
+            digits = re.sub(r'\D', '', customer.phone_number or '')
+            customer.phone_digits = digits or None
+            customer.phone_digits_reversed = digits[::-1] or None
+            name = re.sub(r'\s+', '', customer.name or '').lower()
+            parts = {name[i:i + 2] for i in range(len(name) - 1)} if len(name) > 1 else ({name} if name else set())
+            grams.extend(CustomerSearchGram(customer_id=customer.id, gram=gram) for gram in parts)
+        Customer.objects.bulk_update(customers, ['phone_digits', 'phone_digits_reversed'])
+        CustomerSearchGram.objects.bulk_create(grams)
+        last_id = customers[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0017_reservation_store'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='phone_digits',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='phone_digits_reversed',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=15, null=True),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='name',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.CreateModel(
+            name='CustomerSearchGram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(max_length=2)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_grams', to='service.customer')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='customersearchgram',
+            index=models.Index(fields=['gram', 'customer'], name='customer_gram_idx'),
+        ),
+        migrations.RunPython(fill_search_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 4.2 on 2026-10-18 13:49
+
+from collections import defaultdict
+
+from django.db import migrations, models, transaction
+from django.db.models import Case, Count, IntegerField, Value, When
+
+MERGE_CHUNK_SIZE = 200
+
+
+def merge_duplicate_customers(apps, schema_editor):
+    # 유니크 제약을 걸기 전에 같은 전화번호의 고객을 가장 먼저 등록된 고객으로 합칩니다.
+    # 이 마이그레이션 이후에는 중복이 생길 수 없고, 현재 모델을 쓰는 관리 명령은 이 시점 스키마에서 실행할 수 없으므로
+    # 별도 병합 명령 대신 여기서 중복 그룹을 MERGE_CHUNK_SIZE개씩 나눠 그룹 묶음마다 짧은 트랜잭션으로 처리합니다.
+    Customer = apps.get_model('service', 'Customer')
+    Reservation = apps.get_model('service', 'Reservation')
+    alias = schema_editor.connection.alias
+    duplicated = list(
+        Customer.objects.using(alias).exclude(phone_digits=None)
+        .values('phone_digits').annotate(n=Count('id')).filter(n__gt=1)
+        .values_list('phone_digits', flat=True).order_by('phone_digits')
+    )
+    for offset in range(0, len(duplicated), MERGE_CHUNK_SIZE):
+        chunk = duplicated[offset:offset + MERGE_CHUNK_SIZE]
+        with transaction.atomic(using=alias):
+            members = defaultdict(list)
+            for customer in (
+                Customer.objects.using(alias).select_for_update().filter(phone_digits__in=chunk).order_by('id')
+                .only('id', 'phone_digits', 'reservation_count', 'is_membership', 'membership_status', 'notes')
+            ):
+                members[customer.phone_digits].append(customer)
+
+            keeps = []
+            others_by_keep = {}
+            for customers in members.values():
+                keep, others = customers[0], customers[1:]
+                keep.reservation_count = sum(customer.reservation_count for customer in customers)
+                if any(customer.is_membership for customer in customers):
+                    keep.is_membership = True
+                    keep.membership_status = '멤버십 가입 고객'
+                keep.notes = '\n'.join(customer.notes for customer in customers if customer.notes)
+                keeps.append(keep)
+                others_by_keep[keep.id] = [customer.id for customer in others]
+
+            # 묶음의 예약을 UPDATE 한 번으로 남길 고객에게 옮긴 뒤 나머지 고객을 한 번에 지웁니다.
+            other_ids = [customer_id for ids in others_by_keep.values() for customer_id in ids]
+            Reservation.objects.using(alias).filter(customer_id__in=other_ids).update(customer_id=Case(
+                *[When(customer_id__in=ids, then=Value(keep_id)) for keep_id, ids in others_by_keep.items()],
+                output_field=IntegerField(),
+            ))
+            Customer.objects.using(alias).filter(id__in=other_ids).delete()
+            Customer.objects.using(alias).bulk_update(keeps, ['reservation_count', 'is_membership', 'membership_status', 'notes'])
+
+
+class Migration(migrations.Migration):
+    # 병합을 묶음마다 따로 커밋하도록 마이그레이션 전체를 하나의 트랜잭션으로 감싸지 않습니다.
+    atomic = False
+
+    dependencies = [
+        ('service', '0018_customer_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_customers, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='customer',
+            name='phone_digits',
+            field=models.CharField(blank=True, editable=False, max_length=15, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2 on 2026-10-18 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0019_customer_unique_phone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='last_visit_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='lifetime_spend',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='visit_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['-reservation_count', 'id'], name='customer_reservation_cnt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['-visit_count', 'id'], name='customer_visit_cnt_idx'),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 4.2 on 2026-10-18 13:54
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, Sum
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def fill_ledger(apps, schema_editor):
+    # 기존 방문 완료 예약마다 SALE 항목을 만들고, 매출 보고서를 원장 합계로 다시 맞춥니다.
+    Reservation = apps.get_model('service', 'Reservation')
+    ServiceInventory = apps.get_model('service', 'ServiceInventory')
+    SaleEntry = apps.get_model('service', 'SaleEntry')
+    SalesReport = apps.get_model('service', 'SalesReport')
+
+    costs = dict(
+        ServiceInventory.objects.values('service_id')
+        .annotate(cost=Sum(F('inventory_item__purchase_price') * F('quantity')))
+        .values_list('service_id', 'cost')
+    )
+    last_id = 0
+    while True:
+        rows = list(
+            Reservation.objects.filter(id__gt=last_id, status='방문 완료').order_by('id')
+            .values_list('id', 'store_id', 'service_id', 'assigned_designer_id', 'customer_id', 'reservation_time', 'service__price', 'customer__is_membership')[:1000]
+        )
+        if not rows:
+            break
+        entries = []
+        for reservation_id, store_id, service_id, designer_id, customer_id, reservation_time, price, is_membership in rows:
+            revenue = (price * Decimal('0.9')).quantize(Decimal('0.01')) if is_membership else price
+            expense = costs.get(service_id) or Decimal('0')
+            entries.append(SaleEntry(
+                reservation_id=reservation_id, revision=1, kind='SALE', store_id=store_id, service_id=service_id,
+                designer_id=designer_id, customer_id=customer_id, date=timezone.localdate(reservation_time),
+                sold_at=reservation_time, revenue=revenue, expense=expense, profit=revenue - expense,
+            ))
+        SaleEntry.objects.bulk_create(entries)
+        last_id = rows[-1][0]
+
+    for store_id, date, revenue, expense in (
+        SaleEntry.objects.values('store_id', 'date')
+        .annotate(revenue=Sum('revenue'), expense=Sum('expense'))
+        .values_list('store_id', 'date', 'revenue', 'expense')
+    ):
+        SalesReport.objects.update_or_create(
+            store_id=store_id, date=date,
+            defaults={'total_revenue': revenue, 'total_expenses': expense, 'net_profit': revenue - expense},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0004_delete_managementcalendar'),
+        ('service', '0020_customer_visit_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaleEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('revision', models.PositiveIntegerField(default=1)),
+                ('kind', models.CharField(choices=[('SALE', '매출'), ('VOID', '매출 취소')], default='SALE', max_length=4)),
+                ('date', models.DateField()),
+                ('sold_at', models.DateTimeField()),
+                ('revenue', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('expense', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('profit', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sale_entries', to='service.customer')),
+                ('designer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='stores.storestaff')),
+                ('reservation', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sale_entries', to='service.reservation')),
+                ('service', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='service.service')),
+                ('store', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sale_entries', to='stores.store')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='saleentry',
+            index=models.Index(fields=['store', 'date'], name='sale_entry_store_date_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='saleentry',
+            unique_together={('reservation', 'revision')},
+        ),
+        migrations.RunPython(fill_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2 on 2026-10-18 13:56
+
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import ExtractYear, TruncMonth
+import django.db.models.deletion
+
+
+def fill_rollups(apps, schema_editor):
+    SalesReport = apps.get_model('service', 'SalesReport')
+    SalesReportMonthly = apps.get_model('service', 'SalesReportMonthly')
+    SalesReportYearly = apps.get_model('service', 'SalesReportYearly')
+    sums = {'total_revenue': Sum('total_revenue'), 'total_expenses': Sum('total_expenses'), 'net_profit': Sum('net_profit')}
+    SalesReportMonthly.objects.bulk_create(
+        [SalesReportMonthly(**row) for row in SalesReport.objects.annotate(month=TruncMonth('date')).values('store_id', 'month').annotate(**sums).order_by()],
+        batch_size=1000,
+    )
+    SalesReportYearly.objects.bulk_create(
+        [SalesReportYearly(**row) for row in SalesReport.objects.annotate(year=ExtractYear('date')).values('store_id', 'year').annotate(**sums).order_by()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stores', '0004_delete_managementcalendar'),
+        ('service', '0021_sale_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesReportYearly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_revenue', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('total_expenses', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('net_profit', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('year', models.PositiveSmallIntegerField()),
+                ('store', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='yearly_sales_reports', to='stores.store')),
+            ],
+            options={
+                'unique_together': {('store', 'year')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SalesReportMonthly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_revenue', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('total_expenses', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('net_profit', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('month', models.DateField()),
+                ('store', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_sales_reports', to='stores.store')),
+            ],
+            options={
+                'unique_together': {('store', 'month')},
+            },
+        ),
+        migrations.RunPython(fill_rollups, migrations.RunPython.noop),
+    ]
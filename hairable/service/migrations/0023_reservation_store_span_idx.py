@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-18 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0022_sales_rollups'),
+    ]
+
+    # MySQL에서 store 외래 키가 쓸 인덱스가 없는 순간이 없도록 새 인덱스를 먼저 만듭니다.
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['store', 'reservation_time', 'end_time', 'status'], name='reservation_store_span_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='reservation',
+            name='reservation_store_time_idx',
+        ),
+    ]
@@ -1,8 +1,16 @@
-from django.db import models
-from inventory.models import InventoryItem
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.core.cache import cache
+from django.utils import timezone
+from inventory.models import InventoryItem, StockMovement
 from stores.models import StoreStaff, Category, Store  # 직원 및 카테고리 모델 가져오기
+from collections import defaultdict
 from datetime import timedelta
+from decimal import Decimal
 import datetime
+import re
+import time
 from model_utils import FieldTracker
 # 모델 정의
 
@@ -12,6 +20,44 @@ class ServiceInventory(models.Model):
     inventory_item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField()
 
+    @classmethod
+    def inventory_costs(cls, service_ids):
+        # {서비스 ID: 시술 1회 재고 원가} 를 한 번의 GROUP BY로 계산합니다.
+        return dict(
+            cls.objects.filter(service_id__in=service_ids)
+            .values('service_id')
+            .annotate(cost=Sum(F('inventory_item__purchase_price') * F('quantity')))
+            .values_list('service_id', 'cost')
+        )
+
+    @classmethod
+    def consume(cls, entries):
+        """매출 원장 항목만큼 시술 재고 사용 내역을 남기고 재고를 차감합니다. (VOID 항목이면 되돌립니다.)
+
+        트랜잭션 안에서 호출해야 하며, 재고는 StockMovement.apply로 아이템마다 UPDATE 한 번씩 반영됩니다.
+        {아이템 ID: 차감량} 을 반환합니다.
+        """
+        entries = [entry for entry in entries if entry.service_id]
+        recipes = defaultdict(list)
+        for service_id, item_id, quantity in cls.objects.filter(
+            service_id__in={entry.service_id for entry in entries}
+        ).values_list('service_id', 'inventory_item_id', 'quantity'):
+            recipes[service_id].append((item_id, quantity))
+        movements = [
+            StockMovement(
+                item_id=item_id,
+                kind='SERVICE',
+                quantity=-quantity if entry.kind == 'SALE' else quantity,
+                reservation_id=entry.reservation_id,
+            )
+            for entry in entries
+            for item_id, quantity in recipes[entry.service_id]
+        ]
+        used = defaultdict(int)
+        for movement in StockMovement.apply(movements):
+            used[movement.item_id] -= movement.quantity
+        return {item_id: quantity for item_id, quantity in used.items() if quantity}
+
 class ServiceDesigner(models.Model):
     service = models.ForeignKey('Service', on_delete=models.CASCADE)
     designer = models.ForeignKey('stores.StoreStaff', on_delete=models.CASCADE)
@@ -29,9 +75,53 @@ class Service(models.Model):
         related_name='designer_services'  # 이 서비스를 제공할 수 있는 디자이너들
     )
 
+    tracker = FieldTracker(fields=['duration'])
+
+    def save(self, *args, **kwargs):
+        duration_changed = self.pk and self.tracker.has_changed('duration')
+        super().save(*args, **kwargs)
+        if duration_changed:
+            # 소요 시간이 바뀌면 아직 시작하지 않은 예약의 종료 시각을 함께 맞춥니다.
+            Reservation.objects.filter(service=self, reservation_time__gte=timezone.now()).update(
+                end_time=F('reservation_time') + self.duration
+            )
+
+    def inventory_cost(self):
+        # 시술 1회에 쓰이는 재고의 입고가 합계
+        return ServiceInventory.inventory_costs([self.pk]).get(self.pk, Decimal('0'))
+
     def is_available(self):
         return all(item.inventory_item.is_in_stock(item.quantity) for item in self.serviceinventory_set.all()) and self.available_designers.exists()
 
+def analytics_version_key(store_id):
+    return f'analytics:version:{store_id}'
+
+
+def touch_store_analytics(store_ids):
+    # 매장 예약이 바뀌면 버전을 올려 캐시된 분석 결과(히트맵 등)를 무효화합니다.
+    version = time.time_ns()
+    cache.set_many({analytics_version_key(store_id): version for store_id in set(store_ids)}, None)
+
+
+# 근무 시간은 하루를 넘지 않으므로 예약 하나의 길이도 하루를 넘지 않습니다.
+MAX_RESERVATION_SPAN = timedelta(days=1)
+
+
+class ReservationQuerySet(models.QuerySet):
+    def active(self):
+        return self.exclude(status='예약 취소')
+
+    def overlapping(self, designer, start, end):
+        # (디자이너, 시작 시각, 종료 시각) 인덱스 하나로 겹치는 예약을 찾습니다.
+        # 시작 시각 하한을 두어 디자이너의 과거 예약 전체를 훑지 않도록 합니다.
+        return self.active().filter(
+            assigned_designer=designer,
+            reservation_time__gte=start - MAX_RESERVATION_SPAN,
+            reservation_time__lt=end,
+            end_time__gt=start,
+        )
+
+
 # 예약 모델
 class Reservation(models.Model):
     """_summary_
@@ -43,7 +133,9 @@ class Reservation(models.Model):
     customer_phone_number = models.CharField(max_length=15, blank=True, null=True)
     customer_gender = models.CharField(max_length=1, choices=[('M', '남'), ('F', '여')], blank=True, null=True)
     customer = models.ForeignKey('Customer', on_delete=models.CASCADE)
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, null=True, blank=True, editable=False, related_name='reservations')  # 서비스 매장 (필터용 비정규화)
     reservation_time = models.DateTimeField()
+    end_time = models.DateTimeField(editable=False, help_text="예약 종료 시각 (예약 시각 + 서비스 소요 시간)")
     service = models.ForeignKey(Service, on_delete=models.CASCADE)
     assigned_designer = models.ForeignKey(
     'stores.StoreStaff',
@@ -55,105 +147,382 @@ class Reservation(models.Model):
     status = models.CharField(max_length=20, choices=[('예약 중', '예약 중'), ('예약 대기', '예약 대기'), ('예약 취소', '예약 취소'), ('방문 완료', '방문 완료')])
     created_at = models.DateTimeField(auto_now_add=True)
 
-    
+    objects = ReservationQuerySet.as_manager()
     tracker = FieldTracker()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['assigned_designer', 'reservation_time', 'end_time'], name='reservation_designer_span_idx'),
+            models.Index(fields=['reservation_time', 'id'], name='reservation_time_id_idx'),
+            # 히트맵/수요 예측이 테이블을 읽지 않고 인덱스만으로 집계하도록 종료 시각과 상태까지 담습니다.
+            models.Index(fields=['store', 'reservation_time', 'end_time', 'status'], name='reservation_store_span_idx'),
+            models.Index(fields=['store', 'status', 'reservation_time'], name='reservation_store_status_idx'),
+        ]
+
     def save(self, *args, **kwargs):
-        if not self.pk:  # 새로운 예약인 경우
+        self.end_time = self.reservation_time + self.service.duration
+        is_new = not self.pk
+        if is_new:  # 새로운 예약인 경우
             if not self.service.store:
                 self.service.store = self.assigned_designer.store
                 self.service.save()
-        elif self.status == '방문 완료' and self.tracker.has_changed('status'):
-            self.record_sales()
-        super().save(*args, **kwargs)
+            self.store_id = self.service.store_id
+        with transaction.atomic():
+            previous_status = None
+            if not is_new:
+                # 예약 행을 먼저 잠가 같은 예약의 상태 변경(방문 완료 일괄 처리 포함)을 직렬화하고,
+                # 불러온 뒤 바뀌었을 수 있으므로 이전 상태도 잠근 행에서 읽습니다.
+                previous_status = Reservation.objects.select_for_update().filter(pk=self.pk).values_list('status', flat=True).first()
+            status_changed = previous_status != self.status
+            super().save(*args, **kwargs)
+            if status_changed:
+                self.apply_status_change(previous_status)
+            transaction.on_commit(lambda: touch_store_analytics([self.store_id]))
+
+    def charged_price(self, is_membership=None):
+        # 멤버십 고객은 10% 할인된 금액을 결제합니다.
+        price = self.service.price
+        if self.customer.is_membership if is_membership is None else is_membership:
+            price = (price * Decimal('0.9')).quantize(Decimal('0.01'))
+        return price
+
+    def apply_status_change(self, previous_status):
+        # 상태 변경을 매출 원장, 시술 재고와 고객 통계(취소되지 않은 예약 수, 방문 수, 최근 방문, 누적 결제액)에 반영합니다.
+        # 재고와 방문 통계는 원장에 실제로 기록된 경우에만 바꾸므로 같은 변경이 두 번 들어와도 한 번만 반영됩니다.
+        updates = {}
+        was_active = previous_status not in (None, '예약 취소')
+        is_active = self.status != '예약 취소'
+        if was_active != is_active:
+            updates['reservation_count'] = F('reservation_count') + (1 if is_active else -1)
+
+        was_visit = previous_status == '방문 완료'
+        is_visit = self.status == '방문 완료'
+        if is_visit and not was_visit:
+            entry = SaleEntry.record(self)
+            if entry:
+                ServiceInventory.consume([entry])
+                updates['visit_count'] = F('visit_count') + 1
+                updates['lifetime_spend'] = F('lifetime_spend') + entry.revenue
+                updates['last_visit_at'] = Greatest(Coalesce(F('last_visit_at'), Value(self.reservation_time)), Value(self.reservation_time))
+        elif was_visit and not is_visit:
+            entry = SaleEntry.void(self)
+            if entry:
+                ServiceInventory.consume([entry])
+                updates['visit_count'] = F('visit_count') - 1
+                updates['lifetime_spend'] = F('lifetime_spend') + entry.revenue
+
+        if updates:
+            Customer.objects.filter(pk=self.customer_id).update(**updates)
 
     def record_sales(self):
-        service_price = self.service.price
-        inventory_cost = sum(item.inventory_item.cost * item.quantity for item in self.service.serviceinventory_set.all())
-        net_profit = service_price - inventory_cost
-
-        report, created = SalesReport.objects.get_or_create(
-            store=self.service.store,
-            date=self.reservation_time.date(),
-            defaults={
-                'total_revenue': 0,
-                'total_expenses': 0,
-                'net_profit': 0,
-            }
-        )
+        # 방문 완료 매출을 원장에 기록합니다. 이미 기록된 예약이면 아무 것도 하지 않습니다.
+        return SaleEntry.record(self)
 
-        if not created:
-            # 기존 보고서가 있는 경우, 이전 데이터를 제거
-            report.total_revenue -= service_price
-            report.total_expenses -= inventory_cost
-            report.net_profit -= net_profit
-
-        report.total_revenue += service_price
-        report.total_expenses += inventory_cost
-        report.net_profit += net_profit
-        report.save()
-            
     def calculate_profit(self):
-        service_price = self.service.price
-        inventory_cost = sum(item.inventory_item.cost * item.quantity for item in self.service.serviceinventory_set.all())
-        return service_price - inventory_cost
+        return self.charged_price() - self.service.inventory_cost()
+
+# 디자이너별 하루 단위 예약 잠금 행
+# 같은 디자이너의 같은 날짜 예약만 서로 직렬화하고, 다른 예약은 병렬로 진행되도록 합니다.
+class DesignerScheduleLock(models.Model):
+    designer = models.ForeignKey('stores.StoreStaff', on_delete=models.CASCADE, related_name='schedule_locks')
+    date = models.DateField()
+
+    class Meta:
+        unique_together = ('designer', 'date')
+
+def normalize_phone(value):
+    # 전화번호에서 숫자만 남깁니다. (010-1234-5678 -> 01012345678)
+    return re.sub(r'\D', '', value or '')
+
+
+def normalize_name(value):
+    return re.sub(r'\s+', '', value or '').lower()
+
+
+def name_grams(value):
+    # 이름 검색용 2-gram 목록 (한글은 음절 단위로 나뉩니다). 한 글자 이름은 그대로 사용합니다.
+    name = normalize_name(value)
+    if len(name) < 2:
+        return {name} if name else set()
+    return {name[i:i + 2] for i in range(len(name) - 1)}
+
 
 # 고객 모델
 class Customer(models.Model):
-    name = models.CharField(max_length=100)
+    name = models.CharField(max_length=100, db_index=True)
     gender = models.CharField(max_length=10)
     phone_number = models.CharField(max_length=15)
+    phone_digits = models.CharField(max_length=15, null=True, blank=True, editable=False, unique=True)  # 숫자만 남긴 전화번호 (고객 식별 키)
+    phone_digits_reversed = models.CharField(max_length=15, null=True, blank=True, editable=False, db_index=True)  # 뒷자리 검색용
     membership_status = models.CharField(max_length=20, choices=[('일반 고객', '일반 고객'), ('멤버십 가입 고객', '멤버십 가입 고객')], default='일반 고객')
-    reservation_count = models.IntegerField(default=0)
+    reservation_count = models.IntegerField(default=0)  # 취소되지 않은 예약 수
+    visit_count = models.IntegerField(default=0)  # 방문 완료 수
+    last_visit_at = models.DateTimeField(null=True, blank=True)  # 최근 방문 시각
+    lifetime_spend = models.DecimalField(max_digits=15, decimal_places=2, default=0)  # 누적 결제액
     notes = models.TextField(blank=True)
     is_membership = models.BooleanField(default=False)
 
-# 매출 보고서 모델
-class SalesReport(models.Model):
-    store = models.ForeignKey(Store, on_delete=models.CASCADE, null=True)
-    date = models.DateField()
+    tracker = FieldTracker(fields=['name'])
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-reservation_count', 'id'], name='customer_reservation_cnt_idx'),
+            models.Index(fields=['-visit_count', 'id'], name='customer_visit_cnt_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        digits = normalize_phone(self.phone_number)
+        self.phone_digits = digits or None
+        self.phone_digits_reversed = digits[::-1] or None
+        name_changed = not self.pk or self.tracker.has_changed('name')
+        super().save(*args, **kwargs)
+        if name_changed:
+            CustomerSearchGram.sync([self])
+
+
+# 고객 이름 n-gram 검색 색인
+class CustomerSearchGram(models.Model):
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='search_grams')
+    gram = models.CharField(max_length=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['gram', 'customer'], name='customer_gram_idx'),
+        ]
+
+    @classmethod
+    def sync(cls, customers, chunk_size=1000):
+        customers = list(customers)
+        for offset in range(0, len(customers), chunk_size):
+            chunk = customers[offset:offset + chunk_size]
+            cls.objects.filter(customer_id__in=[customer.pk for customer in chunk]).delete()
+            cls.objects.bulk_create(
+                [cls(customer_id=customer.pk, gram=gram) for customer in chunk for gram in name_grams(customer.name)]
+            )
+
+# 매출 합계 공통 필드 (일별/월별/연별 보고서)
+class SalesTotals(models.Model):
     total_revenue = models.DecimalField(max_digits=15, decimal_places=2)
     total_expenses = models.DecimalField(max_digits=15, decimal_places=2)
     net_profit = models.DecimalField(max_digits=15, decimal_places=2)
 
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def add(cls, revenue, expense, **key):
+        """key로 찾은 행에 금액을 F() 증감으로 더합니다.
+
+        읽고-더하고-저장하는 대신 UPDATE 한 번으로 더하므로 동시에 결제해도 값이 사라지지 않고,
+        행이 없을 때만 생성하며 동시 생성 충돌은 다시 UPDATE로 처리합니다.
+        """
+        increments = {
+            'total_revenue': F('total_revenue') + revenue,
+            'total_expenses': F('total_expenses') + expense,
+            'net_profit': F('net_profit') + (revenue - expense),
+        }
+        if cls.objects.filter(**key).update(**increments):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(total_revenue=revenue, total_expenses=expense, net_profit=revenue - expense, **key)
+        except IntegrityError:
+            cls.objects.filter(**key).update(**increments)
+
+
+# 매출 보고서 모델 (매출 원장의 매장/날짜별 합계)
+class SalesReport(SalesTotals):
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, null=True)
+    date = models.DateField()
+
     class Meta:
         unique_together = ('store', 'date')
 
+    @classmethod
+    def apply_entries(cls, entries):
+        """원장 항목들을 매장별 일/월/연 합계로 묶어 일별, 월별, 연별 보고서에 더합니다.
+
+        여러 요청이 같은 행들을 갱신할 때 교착 상태가 생기지 않도록 항상 같은 순서로 갱신합니다.
+        """
+        days, months, years = defaultdict(lambda: [Decimal('0'), Decimal('0')]), defaultdict(lambda: [Decimal('0'), Decimal('0')]), defaultdict(lambda: [Decimal('0'), Decimal('0')])
+        for entry in entries:
+            for totals, key in ((days, entry.date), (months, entry.date.replace(day=1)), (years, entry.date.year)):
+                totals[(entry.store_id or 0, key)][0] += entry.revenue
+                totals[(entry.store_id or 0, key)][1] += entry.expense
+
+        for (store_id, date), (revenue, expense) in sorted(days.items()):
+            cls.add(revenue, expense, store_id=store_id or None, date=date)
+        for (store_id, month), (revenue, expense) in sorted(months.items()):
+            SalesReportMonthly.add(revenue, expense, store_id=store_id or None, month=month)
+        for (store_id, year), (revenue, expense) in sorted(years.items()):
+            SalesReportYearly.add(revenue, expense, store_id=store_id or None, year=year)
+
     @staticmethod
     def generate_report(store, start_date, end_date):
-        reservations = Reservation.objects.filter(
-            service__store=store,
-            reservation_time__date__range=(start_date, end_date)
+        """기간 내 서비스별, 디자이너별 매출/재료비/이익을 매출 원장에서 집계합니다.
+
+        GROUP BY 쿼리 두 번으로 끝나며, 합계는 서비스별 결과를 더해 구합니다.
+        방문 수는 SALE 항목 수에서 VOID 항목 수를 뺀 값입니다.
+        """
+        entries = SaleEntry.objects.filter(store=store, date__range=(start_date, end_date))
+        amounts = {
+            'revenue': Sum('revenue'),
+            'expense': Sum('expense'),
+            'profit': Sum('profit'),
+            'visits': Count('id', filter=Q(kind='SALE')) - Count('id', filter=Q(kind='VOID')),
+        }
+        services = [
+            {'service_id': row.pop('service_id'), 'service_name': row.pop('service__name'), **row}
+            for row in entries.values('service_id', 'service__name').annotate(**amounts).order_by('-revenue')
+        ]
+        designers = [
+            {'designer': row.pop('designer__user_id'), 'designer_name': row.pop('designer__user__username'), **row}
+            for row in entries.values('designer__user_id', 'designer__user__username').annotate(**amounts).order_by('-revenue')
+        ]
+        totals = {
+            key: sum((row[key] for row in services), Decimal('0') if key != 'visits' else 0)
+            for key in amounts
+        }
+        return {
+            'store': store.id,
+            'start_date': start_date,
+            'end_date': end_date,
+            'totals': totals,
+            'services': services,
+            'designers': designers,
+        }
+
+
+# 월별 매출 보고서 (month는 해당 월 1일)
+class SalesReportMonthly(SalesTotals):
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, null=True, related_name='monthly_sales_reports')
+    month = models.DateField()
+
+    class Meta:
+        unique_together = ('store', 'month')
+
+
+# 연별 매출 보고서
+class SalesReportYearly(SalesTotals):
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, null=True, related_name='yearly_sales_reports')
+    year = models.PositiveSmallIntegerField()
+
+    class Meta:
+        unique_together = ('store', 'year')
+
+
+# 매출 원장 (추가만 하는 기록)
+# 방문 완료 예약마다 SALE 항목 하나, 방문 완료가 취소되면 금액을 뒤집은 VOID 항목을 남깁니다.
+# (reservation, revision) 유니크 키로 같은 상태 변경이 두 번 기록되지 않습니다.
+class SaleEntry(models.Model):
+    KIND_CHOICES = [
+        ('SALE', '매출'),
+        ('VOID', '매출 취소'),
+    ]
+
+    reservation = models.ForeignKey(Reservation, on_delete=models.SET_NULL, null=True, related_name='sale_entries')
+    revision = models.PositiveIntegerField(default=1)
+    kind = models.CharField(max_length=4, choices=KIND_CHOICES, default='SALE')
+    store = models.ForeignKey(Store, on_delete=models.SET_NULL, null=True, related_name='sale_entries')
+    service = models.ForeignKey(Service, on_delete=models.SET_NULL, null=True)
+    designer = models.ForeignKey(StoreStaff, on_delete=models.SET_NULL, null=True, blank=True)
+    customer = models.ForeignKey(Customer, on_delete=models.SET_NULL, null=True, related_name='sale_entries')
+    date = models.DateField()  # 매장 현지 기준 매출 날짜
+    sold_at = models.DateTimeField()
+    revenue = models.DecimalField(max_digits=15, decimal_places=2)
+    expense = models.DecimalField(max_digits=15, decimal_places=2)
+    profit = models.DecimalField(max_digits=15, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('reservation', 'revision')
+        indexes = [
+            models.Index(fields=['store', 'date'], name='sale_entry_store_date_idx'),
+        ]
+
+    @classmethod
+    def for_reservation(cls, reservation, revision=1, is_membership=None, inventory_cost=None):
+        revenue = reservation.charged_price(is_membership)
+        expense = reservation.service.inventory_cost() if inventory_cost is None else inventory_cost
+        return cls(
+            reservation_id=reservation.pk,
+            revision=revision,
+            kind='SALE',
+            store_id=reservation.store_id,
+            service_id=reservation.service_id,
+            designer_id=reservation.assigned_designer_id,
+            customer_id=reservation.customer_id,
+            date=timezone.localdate(reservation.reservation_time),
+            sold_at=reservation.reservation_time,
+            revenue=revenue,
+            expense=expense,
+            profit=revenue - expense,
         )
-        total_revenue = sum(reservation.calculate_cost() for reservation in reservations)
-        total_expenses = sum(
-            item.cost for item in InventoryItem.objects.filter(
-                store=store, 
-                purchase_date__range=(start_date, end_date)
-            )
+
+    @classmethod
+    def record(cls, reservation):
+        """방문 완료된 예약의 매출을 기록하고 보고서에 더합니다. 예약 행을 잠근 트랜잭션 안에서 호출해야 합니다.
+
+        마지막 항목이 이미 SALE이면 None을 반환합니다.
+        """
+        last = cls.objects.filter(reservation_id=reservation.pk).order_by('-revision').first()
+        if last and last.kind == 'SALE':
+            return None
+        entry = cls.for_reservation(reservation, revision=last.revision + 1 if last else 1)
+        entry.save()
+        SalesReport.apply_entries([entry])
+        return entry
+
+    @classmethod
+    def void(cls, reservation):
+        """방문 완료가 취소된 예약의 매출을 같은 금액의 음수 항목으로 되돌립니다.
+
+        되돌릴 SALE 항목이 없으면 None을 반환합니다.
+        """
+        last = cls.objects.filter(reservation_id=reservation.pk).order_by('-revision').first()
+        if not last or last.kind != 'SALE':
+            return None
+        entry = cls.objects.create(
+            reservation_id=reservation.pk,
+            revision=last.revision + 1,
+            kind='VOID',
+            store_id=last.store_id,
+            service_id=last.service_id,
+            designer_id=last.designer_id,
+            customer_id=last.customer_id,
+            date=last.date,
+            sold_at=last.sold_at,
+            revenue=-last.revenue,
+            expense=-last.expense,
+            profit=-last.profit,
         )
-        total_expenses += sum(
-            reservation.assigned_designer.hourly_wage * (reservation.service.duration.total_seconds() / 3600)
-            for reservation in reservations if reservation.assigned_designer
+        SalesReport.apply_entries([entry])
+        return entry
+
+    @classmethod
+    def record_new(cls, reservations, apply_reports=True):
+        """막 생성된(원장 기록이 없는) 방문 완료 예약들의 매출을 한 번에 기록합니다.
+
+        멤버십 여부와 재고 원가는 고객/서비스별로 한 번씩만 조회합니다.
+        apply_reports=False이면 보고서 반영은 호출한 쪽(보고서 재집계)에 맡깁니다.
+        """
+        reservations = [reservation for reservation in reservations if reservation.status == '방문 완료']
+        if not reservations:
+            return []
+        membership = dict(
+            Customer.objects.filter(id__in={reservation.customer_id for reservation in reservations})
+            .values_list('id', 'is_membership')
         )
-        net_profit = total_revenue - total_expenses
-
-        service_sales = {}
-        designer_sales = {}
-        for reservation in reservations:
-            service_name = reservation.service.name
-            designer_name = reservation.assigned_designer.user.username if reservation.assigned_designer else 'Unassigned'
-            cost = reservation.calculate_cost()
-            
-            service_sales[service_name] = service_sales.get(service_name, 0) + cost
-            designer_sales[designer_name] = designer_sales.get(designer_name, 0) + cost
-
-        return SalesReport(
-            store=store,
-            date=end_date,
-            total_revenue=total_revenue,
-            total_expenses=total_expenses,
-            net_profit=net_profit,
-            service_sales=service_sales,
-            designer_sales=designer_sales
-        )
\ No newline at end of file
+        costs = ServiceInventory.inventory_costs({reservation.service_id for reservation in reservations})
+        entries = [
+            cls.for_reservation(
+                reservation,
+                is_membership=membership.get(reservation.customer_id, False),
+                inventory_cost=costs.get(reservation.service_id, Decimal('0')),
+            )
+            for reservation in reservations
+        ]
+        cls.objects.bulk_create(entries, batch_size=500)
+        if apply_reports:
+            SalesReport.apply_entries(entries)
+        return entries
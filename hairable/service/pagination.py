@@ -0,0 +1,10 @@
+from rest_framework.pagination import CursorPagination
+
+
+# 예약 목록 커서 페이지네이션
+# 예약 시각과 id 순서로 다음 페이지 위치를 커서로 넘기므로, 페이지가 깊어져도 OFFSET/COUNT 없이 인덱스 범위만 읽습니다.
+class ReservationCursorPagination(CursorPagination):
+    ordering = ('reservation_time', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
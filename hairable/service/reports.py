@@ -0,0 +1,279 @@
+import datetime
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Sum, Value, When, Window
+from django.db.models.functions import ExtractHour, ExtractYear, Lag, TruncMonth, TruncWeek
+from django.utils import timezone
+from .models import Reservation, SaleEntry, SalesReport, SalesReportMonthly, SalesReportYearly
+
+
+def _next_month(date):
+    return (date.replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+
+
+def _day_start(date):
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time.min))
+
+
+def repair_ledger(store_id, start_date=None, end_date=None, chunk_size=2000):
+    """방문 완료 상태인데 원장 항목이 하나도 없는 예약(쿼리셋 update 등으로 상태만 바뀐 예약)의 매출을 기록합니다.
+
+    id 순으로 chunk_size씩 끊어 읽으므로 예약이 많아도 메모리 사용량이 일정합니다.
+    기록한 항목 수를 반환합니다.
+    """
+    reservations = Reservation.objects.filter(store_id=store_id, status='방문 완료', sale_entries__isnull=True)
+    if start_date:
+        reservations = reservations.filter(reservation_time__gte=_day_start(start_date))
+    if end_date:
+        reservations = reservations.filter(reservation_time__lt=_day_start(end_date + datetime.timedelta(days=1)))
+
+    repaired = 0
+    last_id = 0
+    while True:
+        chunk = list(reservations.filter(id__gt=last_id).select_related('service').order_by('id')[:chunk_size])
+        if not chunk:
+            return repaired
+        with transaction.atomic():
+            repaired += len(SaleEntry.record_new(chunk, apply_reports=False))
+        last_id = chunk[-1].id
+
+
+def _sync_totals(model, store_id, key_field, rows, totals, chunk_size):
+    """잠근 기존 행(rows)을 {키: (매출, 비용)} totals에 맞게 생성/수정/삭제합니다. (생성, 수정, 삭제) 건수를 반환합니다."""
+    existing = {getattr(row, key_field): row for row in rows}
+    created, changed = [], []
+    for key, (revenue, expense) in totals.items():
+        revenue, expense = revenue or Decimal('0'), expense or Decimal('0')
+        row = existing.pop(key, None)
+        if row is None:
+            created.append(model(store_id=store_id, total_revenue=revenue, total_expenses=expense, net_profit=revenue - expense, **{key_field: key}))
+        elif (row.total_revenue, row.total_expenses, row.net_profit) != (revenue, expense, revenue - expense):
+            row.total_revenue, row.total_expenses, row.net_profit = revenue, expense, revenue - expense
+            changed.append(row)
+
+    model.objects.bulk_create(created, batch_size=chunk_size)
+    model.objects.bulk_update(changed, ['total_revenue', 'total_expenses', 'net_profit'], batch_size=chunk_size)
+    model.objects.filter(id__in=[row.id for row in existing.values()]).delete()
+    return len(created), len(changed), len(existing)
+
+
+def rebuild_store_reports(store_id, start_date=None, end_date=None, chunk_size=2000):
+    """한 매장의 일별 매출 보고서를 매출 원장에서 다시 집계해 덮어쓰고, 그 기간이 걸친 월별/연별 보고서도 다시 맞춥니다.
+
+    합계는 SQL GROUP BY로 계산하고, 바뀐 행만 bulk_create/bulk_update 하며
+    원장에 없는 날짜의 보고서는 지웁니다. 여러 번 실행해도 결과가 같습니다.
+    """
+    repaired = repair_ledger(store_id, start_date, end_date, chunk_size)
+
+    entries = SaleEntry.objects.filter(store_id=store_id)
+    days = SalesReport.objects.filter(store_id=store_id)
+    months = SalesReportMonthly.objects.filter(store_id=store_id)
+    years = SalesReportYearly.objects.filter(store_id=store_id)
+    if start_date:
+        entries = entries.filter(date__gte=start_date)
+        days = days.filter(date__gte=start_date)
+        months = months.filter(month__gte=start_date.replace(day=1))
+        years = years.filter(year__gte=start_date.year)
+    if end_date:
+        entries = entries.filter(date__lte=end_date)
+        days = days.filter(date__lte=end_date)
+        months = months.filter(month__lte=end_date)
+        years = years.filter(year__lte=end_date.year)
+
+    with transaction.atomic():
+        # 실시간 F() 증감과 섞이지 않도록 기존 보고서 행을 먼저 잠근 뒤 집계합니다. (일 -> 월 -> 연 순서)
+        day_rows = list(days.select_for_update().order_by('date'))
+        month_rows = list(months.select_for_update().order_by('month'))
+        year_rows = list(years.select_for_update().order_by('year'))
+
+        totals = {
+            date: (revenue, expense)
+            for date, revenue, expense in entries.values('date')
+            .annotate(revenue=Sum('revenue'), expense=Sum('expense'))
+            .values_list('date', 'revenue', 'expense')
+        }
+        created, updated, deleted = _sync_totals(SalesReport, store_id, 'date', day_rows, totals, chunk_size)
+
+        # 월/연 합계는 기간 경계의 달과 해가 통째로 맞도록 일별 보고서 전체에서 다시 계산합니다.
+        daily = SalesReport.objects.filter(store_id=store_id)
+        month_daily = daily.filter(date__gte=start_date.replace(day=1)) if start_date else daily
+        year_daily = daily.filter(date__gte=start_date.replace(month=1, day=1)) if start_date else daily
+        if end_date:
+            month_daily = month_daily.filter(date__lt=_next_month(end_date))
+            year_daily = year_daily.filter(date__lt=end_date.replace(year=end_date.year + 1, month=1, day=1))
+        _sync_totals(SalesReportMonthly, store_id, 'month', month_rows, {
+            month: (revenue, expense)
+            for month, revenue, expense in month_daily.annotate(month=TruncMonth('date')).values('month')
+            .annotate(revenue=Sum('total_revenue'), expense=Sum('total_expenses'))
+            .values_list('month', 'revenue', 'expense').order_by()
+        }, chunk_size)
+        _sync_totals(SalesReportYearly, store_id, 'year', year_rows, {
+            year: (revenue, expense)
+            for year, revenue, expense in year_daily.annotate(year=ExtractYear('date')).values('year')
+            .annotate(revenue=Sum('total_revenue'), expense=Sum('total_expenses'))
+            .values_list('year', 'revenue', 'expense').order_by()
+        }, chunk_size)
+
+    return {
+        'store_id': store_id,
+        'days': len(totals),
+        'repaired': repaired,
+        'created': created,
+        'updated': updated,
+        'deleted': deleted,
+    }
+
+
+# 대시보드 기간 단위별 (보고서 모델, 기간 필드)
+DASHBOARD_TABLES = {
+    'daily': (SalesReport, 'date'),
+    'monthly': (SalesReportMonthly, 'month'),
+    'yearly': (SalesReportYearly, 'year'),
+}
+TODAY_CACHE_SECONDS = 60
+
+
+def owner_dashboard(user, period, start, end):
+    """대표가 소유한 모든 매장의 기간별 매출/비용/이익을 쿼리 한 번으로 돌려줍니다.
+
+    기간 단위에 맞는 보고서 테이블(일/월/연)을 매장과 조인해 한 쿼리로 읽으므로
+    매장 수가 늘어도 쿼리 수는 그대로입니다.
+    """
+    model, field = DASHBOARD_TABLES[period]
+    rows = (
+        model.objects.filter(store__ceo=user, **{f'{field}__range': (start, end)})
+        .order_by('store_id', field)
+        .values_list('store_id', 'store__name', field, 'total_revenue', 'total_expenses', 'net_profit')
+    )
+    stores = {}
+    for store_id, store_name, key, revenue, expense, profit in rows:
+        store = stores.setdefault(store_id, {
+            'store': store_id,
+            'store_name': store_name,
+            'totals': {'total_revenue': Decimal('0'), 'total_expenses': Decimal('0'), 'net_profit': Decimal('0')},
+            'periods': [],
+        })
+        store['periods'].append({'period': key, 'total_revenue': revenue, 'total_expenses': expense, 'net_profit': profit})
+        store['totals']['total_revenue'] += revenue
+        store['totals']['total_expenses'] += expense
+        store['totals']['net_profit'] += profit
+    return list(stores.values())
+
+
+def owner_today_sales(user):
+    """대표가 소유한 매장들의 오늘 현재까지 매출을 매장별로 돌려줍니다. (TODAY_CACHE_SECONDS 동안 캐시)"""
+    today = timezone.localdate()
+    cache_key = f'sales:today:{user.pk}:{today.isoformat()}'
+    result = cache.get(cache_key)
+    if result is None:
+        result = list(
+            SalesReport.objects.filter(store__ceo=user, date=today)
+            .order_by('store_id')
+            .values('store_id', 'total_revenue', 'total_expenses', 'net_profit')
+        )
+        cache.set(cache_key, result, TODAY_CACHE_SECONDS)
+    return result
+
+
+SUMMARY_AMOUNTS = ('total_revenue', 'total_expenses', 'net_profit')
+# summary 기간 단위별 기본 집계 단위
+SUMMARY_PERIODS = {
+    'daily': 'day',
+    'weekly': 'day',
+    'monthly': 'day',
+    'yearly': 'month',
+    'hourly': 'hour',
+    'custom': 'day',
+}
+
+
+def _summary_source(store, bucket, start, end):
+    """집계 단위에 맞는 가장 거친 테이블을 골라 (쿼리셋, 기간 식, 기간 시작 조회 함수, 금액 필드)를 돌려줍니다."""
+    if bucket == 'hour':
+        # 시간대별 매출은 판매 시각이 있는 원장에서만 알 수 있습니다.
+        return (
+            SaleEntry.objects.filter(store=store, date__range=(start, end)),
+            ExtractHour('sold_at'),
+            lambda boundary: Q(date__gte=boundary),
+            ('revenue', 'expense', 'profit'),
+        )
+    whole_months = start.day == 1 and _next_month(end) == end + datetime.timedelta(days=1)
+    if bucket == 'year' and whole_months and start.month == 1 and end.month == 12:
+        return (
+            SalesReportYearly.objects.filter(store=store, year__range=(start.year, end.year)),
+            F('year'),
+            lambda boundary: Q(year__gte=boundary.year),
+            SUMMARY_AMOUNTS,
+        )
+    if bucket in ('month', 'year') and whole_months:
+        return (
+            SalesReportMonthly.objects.filter(store=store, month__range=(start, end)),
+            F('month') if bucket == 'month' else ExtractYear('month'),
+            lambda boundary: Q(month__gte=boundary),
+            SUMMARY_AMOUNTS,
+        )
+    return (
+        SalesReport.objects.filter(store=store, date__range=(start, end)),
+        {'day': F('date'), 'week': TruncWeek('date'), 'month': TruncMonth('date'), 'year': ExtractYear('date')}[bucket],
+        lambda boundary: Q(date__gte=boundary),
+        SUMMARY_AMOUNTS,
+    )
+
+
+def sales_summary(store, bucket, start, end, previous_start=None):
+    """[start, end] 기간 매출을 bucket(hour/day/week/month/year) 단위로 묶어 돌려줍니다.
+
+    previous_start가 있으면 [previous_start, start) 기간까지 한 쿼리로 읽어 두 기간을 나누고,
+    LAG 윈도 함수로 각 행에 직전 값(시간대별은 이전 기간의 같은 시간대)을 붙인 뒤
+    두 기간의 합계와 증감률을 함께 돌려줍니다.
+    """
+    compare = previous_start is not None
+    source, expression, since, (revenue, expense, profit) = _summary_source(store, bucket, previous_start if compare else start, end)
+
+    rows = source.annotate(period=expression)
+    if compare:
+        # 현재 기간 0, 이전 기간 1
+        rows = rows.annotate(window=Case(When(since(start), then=Value(0)), default=Value(1), output_field=IntegerField()))
+        rows = rows.values('window', 'period')
+    else:
+        rows = rows.values('period')
+    rows = rows.annotate(
+        total_revenue=Sum(revenue),
+        total_expenses=Sum(expense),
+        net_profit=Sum(profit),
+    )
+    if not compare:
+        return list(rows.order_by('period'))
+
+    if bucket == 'hour':
+        lag = {'partition_by': [F('period')], 'order_by': F('window').desc()}
+    else:
+        lag = {'order_by': [F('window').desc(), F('period').asc()]}
+    rows = rows.annotate(
+        previous_total_revenue=Window(Lag('total_revenue'), **lag),
+        previous_net_profit=Window(Lag('net_profit'), **lag),
+    ).order_by('-window', 'period')
+
+    current, previous = [], []
+    for row in rows:
+        (current if row.pop('window') == 0 else previous).append(row)
+
+    def totals(group):
+        return {amount: sum((row[amount] or Decimal('0') for row in group), Decimal('0')) for amount in SUMMARY_AMOUNTS}
+
+    current_totals, previous_totals = totals(current), totals(previous)
+    return {
+        'start': start,
+        'end': end,
+        'results': current,
+        'totals': current_totals,
+        'previous': {'start': previous_start, 'end': start - datetime.timedelta(days=1), 'totals': previous_totals},
+        'change': {
+            amount: (
+                round(float((current_totals[amount] - previous_totals[amount]) / abs(previous_totals[amount]) * 100), 2)
+                if previous_totals[amount] else None
+            )
+            for amount in SUMMARY_AMOUNTS
+        },
+    }
@@ -1,5 +1,6 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from .models import Service, Reservation, Customer, Category, Store, StoreStaff, SalesReport, ServiceDesigner, ServiceInventory
+from .models import Service, Reservation, Customer, Category, Store, StoreStaff, SalesReport, ServiceDesigner, ServiceInventory, normalize_phone
 from accounts.models import User
 from stores.serializers import StoreStaffSerializer
 from inventory.models import InventoryItem
@@ -29,6 +30,13 @@ class ServiceSerializer(serializers.ModelSerializer):
         model = Service
         fields = '__all__'
 
+    def validate(self, attrs):
+        store = attrs.get('store', self.instance.store if self.instance else None)
+        for inventory_data in attrs.get('serviceinventory_set') or []:
+            if inventory_data['inventory_item'].store_id != getattr(store, 'id', None):
+                raise serializers.ValidationError("서비스 매장의 재고 아이템만 연결할 수 있습니다.")
+        return attrs
+
     def create(self, validated_data):
         available_designers = validated_data.pop('available_designers', [])
         required_inventory = validated_data.pop('serviceinventory_set', [])
@@ -109,12 +117,15 @@ class ReservationSerializer(serializers.ModelSerializer):
         customer_phone_number = validated_data.pop('customer_phone_number', None)
         customer_gender = validated_data.pop('customer_gender', None)
 
-        # 고객 정보 저장
-        customer, created = Customer.objects.get_or_create(
-            name=customer_name,
-            phone_number=customer_phone_number,
-            defaults={'gender': customer_gender}
-        )
+        # 고객 정보 저장 (정규화된 전화번호 기준 upsert, 동시 생성 시 유니크 제약 충돌은 get_or_create가 재조회로 처리)
+        phone_digits = normalize_phone(customer_phone_number)
+        if phone_digits:
+            customer, created = Customer.objects.get_or_create(
+                phone_digits=phone_digits,
+                defaults={'name': customer_name or '', 'phone_number': customer_phone_number, 'gender': customer_gender or ''}
+            )
+        else:
+            customer = Customer.objects.create(name=customer_name or '', phone_number='', gender=customer_gender or '')
 
         # 예약 생성
         validated_data['customer'] = customer
@@ -126,11 +137,22 @@ class ReservationSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         rep = super().to_representation(instance)
-        if instance.assigned_designer:
-            rep['assigned_designer'] = instance.assigned_designer.user.id
+        if instance.assigned_designer_id:
+            rep['assigned_designer'] = instance.assigned_designer.user_id
         return rep
 
 
+# 일괄 예약용 행 단위 검증 (DB 조회 없이 형식만 확인하고, 관계 확인은 일괄 처리에서 한 번에 수행)
+class ReservationBulkItemSerializer(serializers.Serializer):
+    service = serializers.IntegerField()
+    assigned_designer = serializers.IntegerField()
+    reservation_time = serializers.DateTimeField()
+    customer_name = serializers.CharField(max_length=255, required=False, allow_null=True, allow_blank=True)
+    customer_phone_number = serializers.CharField(max_length=15, required=False, allow_null=True, allow_blank=True)
+    customer_gender = serializers.ChoiceField(choices=[('M', '남'), ('F', '여')], required=False, allow_null=True)
+    status = serializers.ChoiceField(choices=Reservation._meta.get_field('status').choices, default='예약 중')
+
+
 
 class CustomerSerializer(serializers.ModelSerializer):
     reservations = ReservationSerializer(many=True, read_only=True)
@@ -138,10 +160,34 @@ class CustomerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Customer
         fields = '__all__'
-        read_only_fields = ['reservation_count']
+        read_only_fields = ['reservation_count', 'visit_count', 'last_visit_at', 'lifetime_spend']
+
+    def validate_phone_number(self, value):
+        # 형식만 다른 같은 번호(010-5555-1234 / 01055551234)도 같은 고객으로 보고 중복 등록을 막습니다.
+        value = value.strip()
+        digits = normalize_phone(value)
+        if digits:
+            duplicates = Customer.objects.filter(phone_digits=digits)
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError("이미 등록된 전화번호입니다.")
+        return value
+
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            # 검증과 저장 사이에 같은 번호가 먼저 등록된 경우
+            raise serializers.ValidationError({'phone_number': ["이미 등록된 전화번호입니다."]})
 
     def update(self, instance, validated_data):
-        instance = super().update(instance, validated_data)
+        try:
+            with transaction.atomic():
+                instance = super().update(instance, validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({'phone_number': ["이미 등록된 전화번호입니다."]})
         if 'is_membership' in validated_data:
             instance.membership_status = '멤버십 가입 고객' if instance.is_membership else '일반 고객'
             instance.save()
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ServiceViewSet, ReservationViewSet, CustomerViewSet, SalesReportViewSet, CategoryViewSet
+from .views import ServiceViewSet, ReservationViewSet, CustomerViewSet, SalesReportViewSet, CategoryViewSet, AnalyticsViewSet
 
 router = DefaultRouter()
 router.register(r'categories', CategoryViewSet)
@@ -8,6 +8,7 @@ router.register(r'services', ServiceViewSet)
 router.register(r'reservations', ReservationViewSet)
 router.register(r'customers', CustomerViewSet)
 router.register(r'sales-reports', SalesReportViewSet, basename='salesreport')
+router.register(r'analytics', AnalyticsViewSet, basename='analytics')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,29 +1,60 @@
 import logging
 import calendar
+import datetime
+from datetime import timedelta
 from dateutil import parser
-from decimal import Decimal
 from django.db import transaction
-from django.db.models import Q, Sum, F
-from django.db.models.functions import TruncMonth, TruncDay
-from django.utils.dateparse import parse_date
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from .models import Service, Reservation, Customer, SalesReport, Category
 from .serializers import (
     ServiceSerializer, 
     ReservationSerializer, 
+    ReservationBulkItemSerializer,
     CustomerSerializer, 
     SalesReportSerializer, 
     CategorySerializer
 )
-from stores.models import Store, StoreStaff, WorkCalendar
+from .analytics import HEATMAP_RESOLUTIONS, staffing_plan, store_heatmap
+from .availability import find_available_slots, DEFAULT_SLOT_INTERVAL
+from .booking import book_reservation, bulk_book_reservations, check_reschedule, complete_reservations, BookingError
+from .customers import CUSTOMER_ORDERINGS, search_customers, typeahead_customers, TYPEAHEAD_DEFAULT_LIMIT, TYPEAHEAD_MAX_LIMIT
+from .pagination import ReservationCursorPagination
+from .reports import DASHBOARD_TABLES, SUMMARY_PERIODS, owner_dashboard, owner_today_sales, sales_summary
+from stores.models import Store, StoreStaff
+from utils.exports import iter_rows, stream_csv, wants_gzip
 from utils.permissions import UserRolePermission
 
 logger = logging.getLogger(__name__)
 
+
+def parse_time_bound(value, end=False):
+    # YYYY-MM-DD 또는 ISO 일시를 받아 조회 경계 시각으로 변환합니다. 날짜만 주어진 종료일은 그날 하루를 포함합니다.
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is not None:
+        if end:
+            day += timedelta(days=1)
+        moment = datetime.datetime.combine(day, datetime.time.min)
+    else:
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(value)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+MAX_AVAILABILITY_DAYS = 62
+MAX_BULK_RESERVATIONS = 1000
+MAX_STAFFING_DAYS = 42
+
 class ServiceViewSet(viewsets.ModelViewSet):
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
@@ -112,62 +143,206 @@ class ServiceViewSet(viewsets.ModelViewSet):
         except Exception as e:
             logger.error(f"Error deleting service: {str(e)}")
             raise
-            
+
+    # 예약 가능 시간 조회
+    @action(detail=True, methods=['get'])
+    def availability(self, request, pk=None):
+        service = self.get_object()
+        start_param = request.query_params.get('start_date') or ''
+        end_param = request.query_params.get('end_date') or start_param
+        try:
+            start_date = parse_date(start_param)
+            end_date = parse_date(end_param)
+        except ValueError:
+            start_date = end_date = None
+
+        if not start_date or not end_date:
+            return Response({'error': '조회 시작일(start_date)을 YYYY-MM-DD 형식으로 제공해야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if end_date < start_date:
+            return Response({'error': '종료일은 시작일보다 빠를 수 없습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if (end_date - start_date).days >= MAX_AVAILABILITY_DAYS:
+            return Response({'error': f'최대 {MAX_AVAILABILITY_DAYS}일까지 조회할 수 있습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            interval = int(request.query_params.get('interval', DEFAULT_SLOT_INTERVAL.total_seconds() // 60))
+        except ValueError:
+            return Response({'error': '잘못된 슬롯 간격입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if interval < 5:
+            return Response({'error': '슬롯 간격은 5분 이상이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        slots = find_available_slots(service, start_date, end_date, interval=timedelta(minutes=interval))
+        return Response({
+            'service': service.id,
+            'duration': service.duration,
+            'slots': slots,
+        })
+
 class ReservationViewSet(viewsets.ModelViewSet):
     queryset = Reservation.objects.all()
     serializer_class = ReservationSerializer
-    permission_classes = [IsAuthenticated, UserRolePermission("CEO", "manager","designer")]
+    pagination_class = ReservationCursorPagination
+
+    def get_permissions(self):
+        return [IsAuthenticated(), UserRolePermission("CEO", "manager","designer")]
+
+    def get_queryset(self):
+        # 요청자가 대표이거나 직원으로 속한 매장의 예약만 조회합니다.
+        store_ids = list(Store.objects.for_user(self.request.user).values_list('id', flat=True))
+        return Reservation.objects.filter(store_id__in=store_ids).select_related('customer', 'service', 'assigned_designer__user')
+
+    def filter_reservations(self, queryset):
+        # 매장/디자이너/상태/기간 필터 (store, status, reservation_time 복합 인덱스 범위 조회)
+        params = self.request.query_params
+        store_id = params.get('store')
+        designer_id = params.get('designer')
+        statuses = [value for value in params.get('status', '').split(',') if value]
+        time_from = parse_time_bound(params.get('from'))
+        time_to = parse_time_bound(params.get('to'), end=True)
+
+        if store_id:
+            queryset = queryset.filter(store_id=store_id)
+        if designer_id:
+            queryset = queryset.filter(assigned_designer__in=StoreStaff.objects.filter(user_id=designer_id).values('id'))
+        if statuses:
+            queryset = queryset.filter(status__in=statuses)
+        if time_from:
+            queryset = queryset.filter(reservation_time__gte=time_from)
+        if time_to:
+            queryset = queryset.filter(reservation_time__lt=time_to)
+        return queryset
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        service = serializer.validated_data['service']
-        assigned_designer = serializer.validated_data['assigned_designer']
-        reservation_time = serializer.validated_data['reservation_time']
-
-        # 서비스의 소요 시간 계산
-        duration = service.duration
-        end_time = reservation_time + duration
-
-        # 해당 디자이너의 기존 예약 확인
-        overlapping_reservations = Reservation.objects.filter(
-            assigned_designer=assigned_designer,
-            reservation_time__lt=end_time,
-            reservation_time__gt=reservation_time - duration
-        )
+        # 디자이너-날짜 잠금을 잡은 상태에서 중복 확인과 근무 확인 후 예약 생성
+        try:
+            book_reservation(serializer)
+        except BookingError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        if overlapping_reservations.exists():
-            return Response({'detail': '해당 시간에 이미 예약이 있습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
-        # 디자이너의 근무 상태 확인
-        work_calendar = WorkCalendar.objects.filter(
-            staff=assigned_designer,
-            date=reservation_time.date(),
-            status='working'
-        ).first()
+    def perform_update(self, serializer):
+        # 시간/디자이너/서비스를 바꾸는 수정도 예약 생성과 같은 잠금과 중복 확인을 거칩니다.
+        reservation = serializer.instance
+        data = serializer.validated_data
+        with transaction.atomic():
+            try:
+                check_reschedule(
+                    reservation,
+                    data.get('reservation_time', reservation.reservation_time),
+                    data.get('assigned_designer', reservation.assigned_designer),
+                    data.get('service', reservation.service),
+                )
+            except BookingError as e:
+                raise ValidationError({'detail': str(e)})
+            serializer.save()
+
+    # 단체 예약 및 기존 POS 데이터 이관용 일괄 예약 생성
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        rows = request.data.get('reservations') if isinstance(request.data, dict) else request.data
+        allow_partial = str(request.query_params.get('allow_partial', '')).lower() in ('1', 'true')
+
+        if not isinstance(rows, list) or not rows:
+            return Response({'error': '예약 목록(reservations)을 제공해야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > MAX_BULK_RESERVATIONS:
+            return Response({'error': f'한 번에 최대 {MAX_BULK_RESERVATIONS}건까지 등록할 수 있습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        errors = {}
+        valid_rows = []
+        positions = []
+        for index, row in enumerate(rows):
+            item = ReservationBulkItemSerializer(data=row)
+            if item.is_valid():
+                valid_rows.append(item.validated_data)
+                positions.append(index)
+            else:
+                errors[index] = item.errors
+
+        created = []
+        if valid_rows:
+            # 형식 오류가 있으면 전체를 거부하되, 나머지 행의 오류도 함께 알려주기 위해 검증은 끝까지 수행합니다.
+            # 요청자가 대표이거나 직원으로 속한 매장의 예약만 등록할 수 있습니다.
+            created, booking_errors = bulk_book_reservations(
+                valid_rows, allow_partial=allow_partial, commit=allow_partial or not errors,
+                allowed_store_ids=set(Store.objects.for_user(request.user).values_list('id', flat=True)),
+            )
+            errors.update({positions[index]: message for index, message in booking_errors.items()})
+
+        response = {
+            'created': len(created),
+            'errors': [{'index': index, 'errors': errors[index]} for index in sorted(errors)],
+        }
+        return Response(response, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+
+    # 영업 마감 일괄 방문 완료 처리 (ids 목록, 또는 store와 date로 그날 이미 시작한 예약 전체)
+    @action(detail=False, methods=['post'])
+    def complete(self, request):
+        ids = request.data.get('ids')
+        store_id = request.data.get('store')
+        date = request.data.get('date')
+        queryset = self.get_queryset()
+
+        if ids is not None:
+            if not isinstance(ids, list) or not ids:
+                return Response({'error': '예약 ID 목록(ids)을 제공해야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+            if len(ids) > MAX_BULK_RESERVATIONS:
+                return Response({'error': f'한 번에 최대 {MAX_BULK_RESERVATIONS}건까지 처리할 수 있습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(id__in=ids)
+        elif store_id and date:
+            try:
+                day = parse_date(str(date))
+            except ValueError:
+                day = None
+            if day is None:
+                return Response({'error': '잘못된 날짜 형식입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+            start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+            queryset = queryset.filter(
+                store_id=store_id,
+                reservation_time__gte=start,
+                reservation_time__lt=min(start + timedelta(days=1), timezone.now()),
+            )
+        else:
+            return Response({'error': '예약 ID 목록(ids) 또는 매장(store)과 날짜(date)를 제공해야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not work_calendar:
-            return Response({'detail': '해당 날짜에 디자이너가 근무하지 않습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        completed = complete_reservations(queryset)
+        return Response({'completed': len(completed), 'ids': [reservation.id for reservation in completed]})
 
-        # 예약 시간이 근무 시간 내에 있는지 확인
-        if not (work_calendar.start_time <= reservation_time.time() <= work_calendar.end_time):
-            return Response({'detail': '예약 시간이 디자이너의 근무 시간을 벗어났습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+    # 회계용 예약 내역 CSV 내보내기 (대표가 소유한 매장만, list와 같은 필터 사용, ?gzip=1이면 압축)
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        queryset = Reservation.objects.filter(store__in=Store.objects.owned_by(request.user))
+        try:
+            queryset = self.filter_reservations(queryset)
+        except ValueError:
+            return Response({'error': '잘못된 날짜 형식입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        fields = (
+            'store_id', 'store__name', 'reservation_time', 'end_time', 'status', 'service__name', 'service__price',
+            'assigned_designer__user__username', 'customer_id', 'customer_name', 'customer_phone_number',
+        )
+        header = ('id', 'store_id', 'store', 'reservation_time', 'end_time', 'status', 'service', 'price', 'designer', 'customer_id', 'customer_name', 'customer_phone_number')
+        return stream_csv('reservations.csv', header, iter_rows(queryset, fields), compress=wants_gzip(request))
 
-        # 예약 생성
-        self.perform_create(serializer)
-        headers = self.get_success_headers(serializer.data)
-        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
-        
     def list(self, request, *args, **kwargs):
         query = request.query_params.get('query', '')
-        queryset = self.queryset.filter(
-            Q(customer__name__icontains=query) |
-            Q(customer__phone_number__icontains=query) |
-            Q(assigned_designer__user__username__icontains=query)
-        )
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        try:
+            queryset = self.filter_reservations(self.get_queryset())
+        except ValueError:
+            return Response({'error': '잘못된 날짜 형식입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if query:
+            queryset = queryset.filter(
+                Q(customer__name__icontains=query) |
+                Q(customer__phone_number__icontains=query) |
+                Q(assigned_designer__user__username__icontains=query)
+            )
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     # 예약 수정 및 처리
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
@@ -187,64 +362,66 @@ class ReservationViewSet(viewsets.ModelViewSet):
         if new_date:
             try:
                 new_date = parser.parse(new_date)
-                reservation.reservation_time = new_date
             except ValueError:
                 return Response({'error': '잘못된 날짜 형식입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(new_date):
+                new_date = timezone.make_aware(new_date)
 
-        old_status = reservation.status
-        reservation.status = new_status
-        reservation.save()
-
+        # 날짜 변경은 예약 생성과 같이 디자이너-날짜 잠금을 잡고 중복/근무 확인 후 저장합니다.
+        # 방문 완료 매출 기록과 고객 통계 갱신은 Reservation.save 안에서 같은 트랜잭션으로 처리됩니다.
         try:
-            if new_status == '방문 완료' and old_status != '방문 완료':
-                self.update_sales_report(reservation)
-        except Exception as e:
-            # 로그에 오류 기록
-            logger.error(f"Sales report update failed: {str(e)}")
-            # 상태는 변경되었지만 매출 보고서 업데이트에 실패했음을 클라이언트에 알림
-            return Response({'message': '예약 상태가 변경되었지만, 매출 보고서 업데이트에 실패했습니다.'}, status=status.HTTP_200_OK)
+            with transaction.atomic():
+                if new_date:
+                    check_reschedule(reservation, new_date, reservation.assigned_designer, reservation.service)
+                    reservation.reservation_time = new_date
+                reservation.status = new_status
+                reservation.save()
+        except BookingError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response({'message': '예약이 성공적으로 수정되었습니다.'})
 
-    @transaction.atomic
-    def update_sales_report(self, reservation):
-        try:
-            report_date = reservation.reservation_time.date()
-            store = reservation.service.store
-            report, created = SalesReport.objects.get_or_create(
-                store=store,
-                date=report_date,
-                defaults={'total_revenue': 0, 'total_expenses': 0, 'net_profit': 0}
-            )
-
-            service_price = reservation.service.price
-            if reservation.customer.is_membership:
-                service_price *= Decimal('0.9')  # 10% 할인 적용
-
-            inventory_cost = sum(item.inventory_item.cost * item.quantity for item in reservation.service.serviceinventory_set.all())
-            
-            report.total_revenue += service_price
-            report.total_expenses += inventory_cost
-            report.net_profit += (service_price - inventory_cost)
-
-            report.save()
-        except Exception as e:
-            logger.error(f"Failed to update sales report: {str(e)}")
-            raise
-
 class CustomerViewSet(viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
-    permission_classes = [IsAuthenticated, UserRolePermission("CEO", "manager","designer")]
+
+    def get_permissions(self):
+        return [IsAuthenticated(), UserRolePermission("CEO", "manager","designer")]
     
     def list(self, request, *args, **kwargs):
         query = request.query_params.get('query', '')
-        queryset = self.queryset.filter(
-            Q(name__icontains=query) | Q(phone_number__icontains=query)
-        )
+        queryset = search_customers(query) if query else self.queryset
+        # 단골 순 정렬 (?ordering=reservation_count|visit_count|last_visit|lifetime_spend)
+        ordering = request.query_params.get('ordering')
+        if ordering:
+            if ordering not in CUSTOMER_ORDERINGS:
+                return Response({'error': f"ordering은 {', '.join(CUSTOMER_ORDERINGS)} 중 하나여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.order_by(*CUSTOMER_ORDERINGS[ordering])
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    # 대표가 소유한 매장에 예약한 적이 있는 고객 CSV 내보내기 (?gzip=1이면 압축)
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        queryset = Customer.objects.filter(
+            id__in=Reservation.objects.filter(store__in=Store.objects.owned_by(request.user)).values('customer_id')
+        )
+        fields = ('name', 'phone_number', 'gender', 'membership_status', 'reservation_count', 'visit_count', 'last_visit_at', 'lifetime_spend')
+        return stream_csv('customers.csv', ('id', *fields), iter_rows(queryset, fields), compress=wants_gzip(request))
+
+    # 예약 접수용 고객 자동완성 (전화번호 뒷자리/이름 일부)
+    @action(detail=False, methods=['get'])
+    def typeahead(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('limit', TYPEAHEAD_DEFAULT_LIMIT)), TYPEAHEAD_MAX_LIMIT)
+        except ValueError:
+            return Response({'error': '잘못된 limit 값입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not query.strip() or limit < 1:
+            return Response([])
+
+        return Response(typeahead_customers(query, limit))
+
     def update(self, request, *args, **kwargs):
         partial = kwargs.pop('partial', True)
         instance = self.get_object()
@@ -267,15 +444,25 @@ class CustomerViewSet(viewsets.ModelViewSet):
 class SalesReportViewSet(viewsets.ModelViewSet):
     queryset = SalesReport.objects.all()
     serializer_class = SalesReportSerializer
-    permission_classes = [IsAuthenticated, UserRolePermission("CEO", "manager")]
 
+    def get_permissions(self):
+        return [IsAuthenticated(), UserRolePermission("CEO", "manager")]
+
+    # 기간별 매출 요약
+    # period: daily(date=YYYY-MM-DD), weekly(date가 속한 주), monthly(date=YYYY-MM), yearly(date=YYYY),
+    #         hourly(date 또는 from/to 기간의 시간대별), custom(from/to, bucket=hour|day|week|month|year)
+    # compare=1이면 직전 같은 기간(전날/전주/전월/전년, 그 외는 같은 길이의 직전 기간)과 비교합니다.
     @action(detail=False, methods=['get'])
     def summary(self, request):
         store_id = request.query_params.get('store_id')
         date_param = request.query_params.get('date')
         period = request.query_params.get('period', 'daily')
+        start_param = request.query_params.get('from')
+        end_param = request.query_params.get('to')
 
-        if not store_id or not date_param:
+        if period not in SUMMARY_PERIODS:
+            return Response({'error': '잘못된 기간 단위입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not store_id or not (date_param or (period in ('hourly', 'custom') and start_param and end_param)):
             return Response({'error': '매장 ID와 날짜를 제공해야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
@@ -283,35 +470,153 @@ class SalesReportViewSet(viewsets.ModelViewSet):
         except Store.DoesNotExist:
             return Response({'error': '잘못된 매장 ID입니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        bucket = SUMMARY_PERIODS[period]
         try:
             if period == 'yearly':
-                start_date = parse_date(f"{date_param}-01-01")
-                end_date = parse_date(f"{date_param}-12-31")
+                start_date = datetime.date(int(date_param), 1, 1)
+                end_date = datetime.date(int(date_param), 12, 31)
+                previous_start = start_date.replace(year=start_date.year - 1)
             elif period == 'monthly':
                 year, month = date_param.split('-')
-                start_date = parse_date(f"{year}-{month}-01")
-                end_date = parse_date(f"{year}-{month}-{calendar.monthrange(int(year), int(month))[1]}")
-            else:  # daily
+                start_date = datetime.date(int(year), int(month), 1)
+                end_date = start_date.replace(day=calendar.monthrange(start_date.year, start_date.month)[1])
+                previous_start = (start_date - timedelta(days=1)).replace(day=1)
+            elif period == 'weekly':
+                start_date = parse_date(date_param)
+                start_date -= timedelta(days=start_date.weekday())
+                end_date = start_date + timedelta(days=6)
+                previous_start = start_date - timedelta(days=7)
+            elif start_param and end_param and period in ('hourly', 'custom'):
+                start_date, end_date = parse_date(start_param), parse_date(end_param)
+                previous_start = start_date - (end_date - start_date) - timedelta(days=1)
+                if period == 'custom':
+                    bucket = request.query_params.get('bucket', 'day')
+            else:  # daily, hourly(하루)
                 start_date = end_date = parse_date(date_param)
+                previous_start = start_date - timedelta(days=1)
+        except (ValueError, TypeError):
+            return Response({'error': '잘못된 날짜 형식입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if bucket not in ('hour', 'day', 'week', 'month', 'year'):
+            return Response({'error': 'bucket은 hour, day, week, month, year 중 하나여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date:
+            return Response({'error': '시작 날짜가 종료 날짜보다 늦습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        compare = request.query_params.get('compare') in ('1', 'true')
+        return Response(sales_summary(store, bucket, start_date, end_date, previous_start if compare else None))
+
+    # 대표가 소유한 매장의 일별 매출 보고서 CSV 내보내기 (?store=&from=YYYY-MM-DD&to=YYYY-MM-DD&gzip=1)
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        queryset = SalesReport.objects.filter(store__in=Store.objects.owned_by(request.user))
+        store_id = request.query_params.get('store')
+        try:
+            start_date = parse_date(request.query_params.get('from') or '')
+            end_date = parse_date(request.query_params.get('to') or '')
+        except ValueError:
+            return Response({'error': '잘못된 날짜 형식입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if store_id:
+            queryset = queryset.filter(store_id=store_id)
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+        fields = ('store_id', 'store__name', 'date', 'total_revenue', 'total_expenses', 'net_profit')
+        header = ('id', 'store_id', 'store', 'date', 'total_revenue', 'total_expenses', 'net_profit')
+        return stream_csv('sales_reports.csv', header, iter_rows(queryset, fields), compress=wants_gzip(request))
+
+    # 대표가 소유한 전체 매장의 기간별 매출 (?period=daily|monthly|yearly&from=&to=&today=1)
+    # daily는 YYYY-MM-DD, monthly는 YYYY-MM, yearly는 YYYY 형식이며 생략하면 최근 30일/12개월/5년입니다.
+    @action(detail=False, methods=['get'])
+    def dashboard(self, request):
+        period = request.query_params.get('period', 'monthly')
+        if period not in DASHBOARD_TABLES:
+            return Response({'error': '잘못된 기간 단위입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        today = timezone.localdate()
+        start_param = request.query_params.get('from')
+        end_param = request.query_params.get('to')
+        try:
+            if period == 'yearly':
+                end = int(end_param) if end_param else today.year
+                start = int(start_param) if start_param else end - 4
+            elif period == 'monthly':
+                end = parse_date(f'{end_param}-01') if end_param else today.replace(day=1)
+                start = parse_date(f'{start_param}-01') if start_param else (end - timedelta(days=320)).replace(day=1)
+            else:
+                end = parse_date(end_param) if end_param else today
+                start = parse_date(start_param) if start_param else end - timedelta(days=29)
+        except ValueError:
+            return Response({'error': '잘못된 날짜 형식입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if start is None or end is None:
+            return Response({'error': '잘못된 날짜 형식입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        data = {'period': period, 'from': start, 'to': end, 'stores': owner_dashboard(request.user, period, start, end)}
+        if request.query_params.get('today') in ('1', 'true'):
+            data['today'] = owner_today_sales(request.user)
+        return Response(data)
+
+    # 기간 내 서비스별/디자이너별 매출, 재료비, 이익 (?store_id=&from=YYYY-MM-DD&to=YYYY-MM-DD)
+    @action(detail=False, methods=['get'])
+    def breakdown(self, request):
+        store_id = request.query_params.get('store_id')
+        try:
+            start_date = parse_date(request.query_params.get('from') or '')
+            end_date = parse_date(request.query_params.get('to') or '')
         except ValueError:
             return Response({'error': '잘못된 날짜 형식입니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        reports = SalesReport.objects.filter(store=store, date__range=[start_date, end_date])
+        if not store_id or not start_date or not end_date:
+            return Response({'error': '매장 ID와 기간(from, to)을 YYYY-MM-DD 형식으로 제공해야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date:
+            return Response({'error': '시작 날짜가 종료 날짜보다 늦습니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if period == 'yearly':
-            reports = reports.annotate(period=TruncMonth('date'))
-        elif period == 'monthly':
-            reports = reports.annotate(period=TruncDay('date'))
-        else:  # daily
-            reports = reports.values('date').annotate(period=F('date'))
+        store = Store.objects.for_user(request.user).filter(id=store_id).first()
+        if store is None:
+            return Response({'error': '잘못된 매장 ID입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(SalesReport.generate_report(store, start_date, end_date))
+
+# 매장 운영 분석
+class AnalyticsViewSet(viewsets.ViewSet):
+    def get_permissions(self):
+        return [IsAuthenticated(), UserRolePermission("CEO", "manager")]
 
-        reports = reports.values('period').annotate(
-            total_revenue=Sum('total_revenue'),
-            total_expenses=Sum('total_expenses'),
-            net_profit=Sum('net_profit')
-        ).order_by('period')
+    # 요일 x 시간대 예약 점유 분 히트맵 (?store_id=&designer=&from=&to=&resolution=15|30|60, 기본 최근 12주)
+    @action(detail=False, methods=['get'])
+    def heatmap(self, request):
+        store_id = request.query_params.get('store_id')
+        try:
+            designer_id = int(request.query_params.get('designer') or 0) or None
+            resolution = int(request.query_params.get('resolution', 60))
+            end_date = parse_date(request.query_params.get('to') or '') or timezone.localdate()
+            start_date = parse_date(request.query_params.get('from') or '') or end_date - timedelta(weeks=12) + timedelta(days=1)
+        except ValueError:
+            return Response({'error': '잘못된 날짜 또는 단위 형식입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if resolution not in HEATMAP_RESOLUTIONS:
+            return Response({'error': f"resolution은 {', '.join(map(str, HEATMAP_RESOLUTIONS))} 중 하나여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date > end_date:
+            return Response({'error': '시작 날짜가 종료 날짜보다 늦습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not store_id or not Store.objects.for_user(request.user).filter(id=store_id).exists():
+            return Response({'error': '잘못된 매장 ID입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(store_heatmap(int(store_id), start_date, end_date, designer_id=designer_id, resolution=resolution))
+
+    # 앞으로 days일(기본 14일, 최대 MAX_STAFFING_DAYS)의 날짜별 권장 디자이너 수와 근무표 대비 부족 시간대 (?store_id=&days=)
+    @action(detail=False, methods=['get'])
+    def staffing(self, request):
+        store_id = request.query_params.get('store_id')
+        try:
+            days = int(request.query_params.get('days', 14))
+        except ValueError:
+            return Response({'error': '잘못된 기간 형식입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= days <= MAX_STAFFING_DAYS:
+            return Response({'error': f'기간은 1일 이상 {MAX_STAFFING_DAYS}일 이하로 지정해야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not store_id or not Store.objects.for_user(request.user).filter(id=store_id).exists():
+            return Response({'error': '잘못된 매장 ID입니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(list(reports))
+        return Response(staffing_plan(int(store_id), timezone.localdate(), days))
 
 # 카테고리 뷰셋 정의
 class CategoryViewSet(viewsets.ModelViewSet):
@@ -4,10 +4,22 @@ from django.core.exceptions import ValidationError #주석 : 오류 발생 시 
 
 User = get_user_model()
 
+
+class StoreQuerySet(models.QuerySet):
+    def owned_by(self, user):
+        return self.filter(ceo=user)
+
+    def for_user(self, user):
+        # 대표로 소유하거나 직원으로 소속된 매장
+        return self.filter(models.Q(ceo=user) | models.Q(store_staff__user=user)).distinct()
+
+
 class Store(models.Model):
     name = models.CharField(max_length=255, unique=True)
     ceo = models.ForeignKey(User, on_delete=models.CASCADE, related_name='stores')
     address = models.CharField(max_length=255, default='unknown')
+
+    objects = StoreQuerySet.as_manager()
     
     def __str__(self):
         return self.name
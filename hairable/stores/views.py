@@ -266,15 +266,7 @@ class WorkCalendarViewSet(viewsets.ModelViewSet):
             except ValueError:
                 return Response({'error': '잘못된 날짜 형식입니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        old_status = reservation.status
         reservation.status = new_status
         reservation.save()
 
-        if new_status == '방문 완료' and old_status != '방문 완료':
-            try:
-                reservation.record_sales()
-            except Exception as e:
-                logger.error(f"Sales report update failed: {str(e)}")
-                return Response({'message': '예약 상태가 변경되었지만, 매출 보고서 업데이트에 실패했습니다.'}, status=status.HTTP_200_OK)
-
         return Response({'message': '예약이 성공적으로 수정되었습니다.'})
\ No newline at end of file
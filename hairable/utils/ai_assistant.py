@@ -49,8 +49,7 @@ class AIAssistantView(APIView):
                 ]
 
                 # 매장 관련 재고 정보
-                # InventoryItem에 Store와 직접 연결된 필드가 없을 경우 수정 필요
-                inventory_data = InventoryItem.objects.filter(serviceinventory__service__store=store).distinct()
+                inventory_data = InventoryItem.objects.filter(store=store).select_related('category')
                 inventory_details = [
                     {
                         "name": inventory.name,
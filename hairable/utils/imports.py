@@ -0,0 +1,48 @@
+import csv
+import io
+
+
+class ImportFileError(Exception):
+    pass
+
+
+def _cell(value):
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value == '' else value
+
+
+def iter_upload_rows(upload):
+    """업로드된 CSV 또는 XLSX 파일을 (행 번호, {헤더: 값}) 으로 한 행씩 읽습니다.
+
+    파일 전체를 메모리에 올리지 않고 읽으며, 헤더는 앞뒤 공백을 지우고 소문자로 맞춥니다.
+    빈 칸은 None, 완전히 빈 행은 건너뜁니다. 행 번호는 헤더를 1행으로 센 파일 기준 번호입니다.
+    """
+    name = (upload.name or '').lower()
+    if name.endswith('.xlsx'):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ImportFileError('Reading XLSX files requires openpyxl')
+        try:
+            workbook = load_workbook(upload, read_only=True, data_only=True)
+        except Exception:
+            raise ImportFileError('Invalid XLSX file')
+        rows = workbook.active.iter_rows(values_only=True)
+    elif name.endswith('.csv'):
+        # 엑셀에서 저장한 CSV의 BOM은 utf-8-sig로 지웁니다.
+        rows = csv.reader(io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''))
+    else:
+        raise ImportFileError('Only .csv and .xlsx files are supported')
+
+    try:
+        header = next(rows, None)
+        if not header:
+            raise ImportFileError('The file has no header row')
+        header = [str(column or '').strip().lower() for column in header]
+        for number, row in enumerate(rows, 2):
+            values = [_cell(value) for value in row]
+            if any(value is not None for value in values):
+                yield number, dict(zip(header, values))
+    except UnicodeDecodeError:
+        raise ImportFileError('CSV files must be UTF-8 encoded')